@@ -0,0 +1,61 @@
+import os, json, time, random
+from typing import Dict, Any
+
+# debugging aid: capture the first bytes of a sample of response bodies
+ACCESS_LOG_BODY_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_BODY_SAMPLE_RATE", "0"))
+ACCESS_LOG_BODY_MAX_BYTES = int(os.getenv("ACCESS_LOG_BODY_MAX_BYTES", "2048"))
+
+
+class AccessLogMiddleware:
+    """
+    One JSON line per request: method, path, status, latency and bytes sent.
+
+    Plain ASGI so the response is never buffered, body chunks are counted as they
+    pass through (streaming responses keep streaming). Body capture is off unless
+    body_sample_rate > 0, and then only the first body_max_bytes are kept.
+    """
+
+    def __init__(
+        self,
+        app,
+        body_sample_rate: float = ACCESS_LOG_BODY_SAMPLE_RATE,
+        body_max_bytes: int = ACCESS_LOG_BODY_MAX_BYTES,
+    ):
+        self.app = app
+        self.body_sample_rate = body_sample_rate
+        self.body_max_bytes = body_max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        capture = self.body_sample_rate > 0 and random.random() < self.body_sample_rate
+        state: Dict[str, Any] = {"status": None, "bytes": 0, "body": bytearray()}
+
+        async def send_and_count(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                state["bytes"] += len(chunk)
+                room = self.body_max_bytes - len(state["body"])
+                if capture and room > 0:
+                    state["body"].extend(chunk[:room])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_count)
+        finally:
+            record = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": state["status"] or 500,  # no response started means we blew up
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                "bytes": state["bytes"],
+            }
+            if capture:
+                record["body"] = state["body"].decode("utf-8", errors="replace")
+            print(json.dumps(record), flush=True)
@@ -1,114 +1,155 @@
-import aiohttp, asyncio, os
-from typing import Dict, Any, List
+import aiohttp, os, time
+from typing import Dict, Any, List, Optional, Callable, Sequence
 
-API_BASE = "https://api.devin.ai/v1"
+from .session_watcher import SessionWatcher
+from .scheduler import SessionScheduler
+from .rate_limit import RateLimiter
+from .metrics import DEVIN_CREATE_SECONDS, DEVIN_SESSION_SECONDS, DEVIN_POLLS, DEVIN_TIMEOUTS
+from .issue_index import Issue
+from . import prompts
+
+API_BASE = os.getenv("DEVIN_API_BASE", "https://api.devin.ai/v1")
 OWNER = os.getenv("GITHUB_OWNER")
 BASE_URL=f"https://github.com/{OWNER}" # https://github.com/ntua-el19128/{repo_name}/{}.
 
+TERMINAL_STATUSES = {"finished", "expired", "blocked",
+                     "suspend_requested", "suspend_requested_frontend"}
+
+def _session_done(body: Dict[str, Any], wait_for_pr: bool) -> bool:
+    """Whether a session has what we're waiting for (action plan / PR) or has stopped."""
+    so = body.get("structured_output")
+    if isinstance(so, dict):
+        if wait_for_pr:
+            if (
+                so.get("pull_request_url")
+                or so.get("branch_name")
+                or so.get("commits")
+                or body.get("pull_request")
+            ):
+                return True
+
+        else:
+            ap = so.get("action_plan")
+            if isinstance(ap, list) and len(ap) > 0:
+                return True
+
+    status = (body.get("status_enum") or body.get("status") or "").lower()
+    return status in TERMINAL_STATUSES
+
 class DevinClient:
-    def __init__(self, session: aiohttp.ClientSession):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_key: Optional[str] = None,
+        scheduler: Optional[SessionScheduler] = None,
+        limiter: Optional[RateLimiter] = None,
+        api_base: str = API_BASE,
+    ):
         self.session = session
+        self.api_base = api_base.rstrip("/")
+        # caps and orders sessions across every batch and caller
+        self.scheduler = scheduler or SessionScheduler()
+        # rate limit budget + retries (polls retry on 429/5xx, creates only on 429)
+        self.limiter = limiter or RateLimiter("devin")
+        # auth per request, the session is shared with the GitHub client
+        self.headers = {"Authorization": f"Bearer {api_key or os.getenv('DEVIN_API_KEY')}"}
+        self.watcher = SessionWatcher(self._get_session)
 
     async def _create_session(self, prompt: str) -> str:
-        async with self.session.post(
-            f"{API_BASE}/sessions",
-            json={"prompt": prompt},
-        ) as resp:
-            data = await resp.json()
-            if resp.status >= 400:
-                raise RuntimeError(f"Devin session creation failed: {data}")
-            return data["session_id"]
-
-    # kinda similar to devin api docs poll
+        with DEVIN_CREATE_SECONDS.time():
+            async with self.limiter.request(
+                self.session,
+                "POST",
+                f"{self.api_base}/sessions",
+                json={"prompt": prompt},
+                headers=self.headers,
+            ) as resp:
+                data = await resp.json()
+                if resp.status >= 400:
+                    raise RuntimeError(f"Devin session creation failed: {data}")
+                return data["session_id"]
+
+    async def _start_or_resume(self, prompt: str, session_id: Optional[str], on_session: Optional[Callable[[str], None]]) -> str:
+        """Reattach to a session we already started (e.g. before a restart) or create a new one."""
+        if session_id:
+            return session_id
+        sid = await self._create_session(prompt)
+        if on_session:
+            on_session(sid)
+        return sid
+
+    async def _get_session(self, session_id: str) -> Dict[str, Any]:
+        async with self.limiter.request(self.session, "GET", f"{self.api_base}/sessions/{session_id}", headers=self.headers) as r:
+            body = await r.json()
+            if r.status >= 400:
+                raise RuntimeError(f"Devin poll failed: {body}")
+            return body
+
+    # kinda similar to devin api docs poll, but all sessions share one watcher loop
     async def _poll(self, session_id: str, max_wait_seconds: int = 600, wait_for_pr: bool = False) -> Dict[str, Any]:
-        backoff = 10
-        waited = 0
-        while True:
-            async with self.session.get(f"{API_BASE}/sessions/{session_id}") as r:
-                body = await r.json()
-                if r.status >= 400:
-                    raise RuntimeError(f"Devin poll failed: {body}")
-
-                so = body.get("structured_output")
-                if isinstance(so, dict):
-                    if wait_for_pr:
-                        if (
-                            so.get("pull_request_url")
-                            or so.get("branch_name")
-                            or so.get("commits")
-                            or body.get("pull_request")
-                        ):
-                            return body
-
-                    else:
-                        ap = so.get("action_plan")
-                        if isinstance(ap, list) and len(ap) > 0:
-                            return body
-
-                status = (body.get("status_enum") or body.get("status") or "").lower()
-                print(f"[poll] session={session_id} status={status} waited={waited}s")
-
-                if status in {"finished", "expired", "blocked",
-                              "suspend_requested", "suspend_requested_frontend"}:
-                    return body
-
-            sleep_for = min(backoff, 30)
-            await asyncio.sleep(sleep_for)
-            waited += sleep_for
-            backoff = min(backoff * 2, 30)
-
-            if waited >= max_wait_seconds:
-                raise TimeoutError("Devin did not finish in time.")
+        stage = "implement" if wait_for_pr else "scope"
+        started = time.monotonic()
+        polls = 0
+
+        def is_done(body: Dict[str, Any]) -> bool:
+            nonlocal polls
+            polls += 1  # the watcher checks every status it fetches
+            return _session_done(body, wait_for_pr)
+
+        try:
+            body = await self.watcher.wait(session_id, is_done, max_wait_seconds)
+        except TimeoutError:
+            DEVIN_TIMEOUTS.inc(stage=stage)
+            raise
+        finally:
+            DEVIN_POLLS.observe(polls, stage=stage)
+        DEVIN_SESSION_SECONDS.observe(time.monotonic() - started, stage=stage)
+        return body
             
     # Devin 1 : Scoper
-    async def scope_issue(self, repo: str, issue_number: int, issue_title: str, max_wait_seconds: int = 600) -> Dict[str, Any]:
+    async def scope_issue(
+        self,
+        repo: str,
+        issue_number: int,
+        issue_title: str,
+        max_wait_seconds: int = 600,
+        session_id: Optional[str] = None,
+        on_session: Optional[Callable[[str], None]] = None,
+        priority: int = 0,
+        caller: str = "anonymous",
+        issue: Optional[Issue] = None,
+        comments: Sequence[Dict[str, Any]] = (),
+    ) -> Dict[str, Any]:
         
         repo_url=f"{BASE_URL}/{repo}"
 
-        # devin 1 prompt
-        base_prompt = f"""
-Hey devin. Your task is to scope the GitHub issue #{issue_number} titled "{issue_title}" in the repository {repo_url}.
-Return ONLY valid JSON in this exact shape:
-{{
-  "issue_number": "{issue_number}",
-  "issue_title": "{issue_title}",
-  "summary": "<one-sentence scope of the issue>",
-  "confidence_score": "Low | Medium | High", 
-  "action_plan": [
-    "<step 1>",
-    "<step 2>",
-    "<step 3>"
-  ]
-}}
-"""
-        prompt = base_prompt
-        sid = await self._create_session(prompt)
-        done = await self._poll(sid, max_wait_seconds=max_wait_seconds, wait_for_pr=False)
+        # devin 1 prompt: title plus body, labels and recent comments so it doesn't have to go look
+        prompt = prompts.scope_prompt(repo_url, issue_number, issue_title, issue, comments)
+        async with self.scheduler.slot(repo, caller, priority):
+            sid = await self._start_or_resume(prompt, session_id, on_session)
+            done = await self._poll(sid, max_wait_seconds=max_wait_seconds, wait_for_pr=False)
         return done.get("structured_output", {})
 
     # Devin 2
-    async def implement_issue(self, repo: str, issue_number: int, issue_title: str, action_plan: List[str], max_wait_seconds: int = 900,) -> Dict[str, Any]:
+    async def implement_issue(
+        self,
+        repo: str,
+        issue_number: int,
+        issue_title: str,
+        action_plan: List[str],
+        max_wait_seconds: int = 900,
+        session_id: Optional[str] = None,
+        on_session: Optional[Callable[[str], None]] = None,
+        priority: int = 0,
+        caller: str = "anonymous",
+        issue: Optional[Issue] = None,
+    ) -> Dict[str, Any]:
         
         repo_url=f"{BASE_URL}/{repo}"
-        plan_lines = "\n".join(f"- {s}" for s in action_plan)
 
         # Devin 2 prompt
-        prompt = f"""
-Hey Devin. Your task is to take a given action plan and complete the ticket for the specified repository.
-Repo: {repo_url}
-Issue #{issue_number} titled: "{issue_title}"
-
-
-Action plan:
-{plan_lines}
-
-Additionally, please:
-
-1) Create and checkout branch: "devin/issue-{issue_number}-[short_title]" (The short_title should be derived from the issue title.)
-2) Implement changes with clear commits mentioning "{issue_number}-[short_title]"
-3) Push the branch
-4) Open a Pull Request referencing the issue number #{issue_number} in the title/body
-"""
-        sid = await self._create_session(prompt)
-        done = await self._poll(sid, max_wait_seconds=max_wait_seconds, wait_for_pr=True)
+        prompt = prompts.implement_prompt(repo_url, issue_number, issue_title, action_plan, issue)
+        async with self.scheduler.slot(repo, caller, priority):
+            sid = await self._start_or_resume(prompt, session_id, on_session)
+            done = await self._poll(sid, max_wait_seconds=max_wait_seconds, wait_for_pr=True)
         return done.get("structured_output", {})
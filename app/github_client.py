@@ -1,36 +1,179 @@
-import os
-import requests
+import os, asyncio, aiohttp
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
+from .rate_limit import RateLimiter
+from .metrics import GITHUB_FETCH_SECONDS
+
 load_dotenv()
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 OWNER = os.getenv("GITHUB_OWNER")
 
-BASE_URL = "https://api.github.com"
-
-
-def _headers():
-    return {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "X-GitHub-Api-Version": "2022-11-28"
-    }
-
-
-def fetch_issues(repo: str):
-    """Fetch list of issues for the repo."""
-    url = f"{BASE_URL}/repos/{OWNER}/{repo}/issues"
-    try:
-        response = requests.get(url, headers=_headers())
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response is not None and e.response.status_code == 404:
-            raise ValueError(f" Repository '{repo}' not found")
-        else:
-            raise RuntimeError(
-                f"GitHub API error {e.response.status_code if e.response else '???'}: {e}"
-            )
-        
+BASE_URL = os.getenv("GITHUB_API_BASE", "https://api.github.com")
+
+PER_PAGE = 100  # github max
+MAX_PAGE_WORKERS = int(os.getenv("GITHUB_MAX_PAGE_WORKERS", "8"))
+
+
+@dataclass
+class IssueListing:
+    issues: List[Dict[str, Any]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class GitHubClient:
+    """Async GitHub issues client on the app's shared aiohttp session."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        token: Optional[str] = GITHUB_TOKEN,
+        owner: Optional[str] = OWNER,
+        base_url: str = BASE_URL,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.session = session
+        # X-RateLimit budget + retries for every GitHub call
+        self.limiter = limiter or RateLimiter("github")
+        self.token = token
+        self.owner = owner
+        self.base_url = base_url.rstrip("/")
+
+    def _headers(self) -> Dict[str, str]:
+        # per request, the session is shared with the Devin client
+        return {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.token}",
+            "X-GitHub-Api-Version": "2022-11-28"
+        }
+
+    @staticmethod
+    def _last_page(resp: aiohttp.ClientResponse) -> int:
+        """Read the last page number from the Link header (1 if there is only one page)."""
+        last = resp.links.get("last", {}).get("url")
+        if not last:
+            return 1
+        page = last.query.get("page")
+        return int(page) if page else 1
+
+    async def _get_page(
+        self,
+        repo: str,
+        url: str,
+        page: int,
+        extra_headers: Optional[Dict[str, str]] = None,
+        extra_params: Optional[Dict[str, str]] = None,
+    ):
+        """GET one page of issues. Returns (response, body), body is None on 304."""
+        async with self.limiter.request(
+            self.session,
+            "GET",
+            url,
+            headers={**self._headers(), **(extra_headers or {})},
+            # most recently updated first, so any edit changes page 1 (and its ETag)
+            # (closes and deletes only do when page 1 is all there is, see _fetch_issues)
+            params={"per_page": PER_PAGE, "page": page, "sort": "updated", "direction": "desc", **(extra_params or {})},
+        ) as resp:
+            if resp.status == 304:
+                return resp, None
+            if resp.status == 404:
+                raise ValueError(f" Repository '{repo}' not found")
+            if resp.status >= 400:
+                text = await resp.text()
+                raise RuntimeError(f"GitHub API error {resp.status}: {text}")
+            return resp, await resp.json()
+
+    async def repo_exists(self, repo: str) -> bool:
+        """One small GET /repos/{owner}/{repo}, no issue listing. False on 404."""
+        async with self.limiter.request(
+            self.session, "GET", f"{self.base_url}/repos/{self.owner}/{repo}", headers=self._headers(),
+        ) as resp:
+            if resp.status == 404:
+                return False
+            if resp.status >= 400:
+                text = await resp.text()
+                raise RuntimeError(f"GitHub API error {resp.status}: {text}")
+            return True
+
+    async def fetch_comments(self, repo: str, issue_number: int, total: int = 0) -> List[Dict[str, Any]]:
+        """Comments of one issue, oldest first. Only the last page if there are more than fit in one (total = issue's comment count)."""
+        url = f"{self.base_url}/repos/{self.owner}/{repo}/issues/{issue_number}/comments"
+        page = max(1, -(-total // PER_PAGE))
+        async with self.limiter.request(
+            self.session, "GET", url, headers=self._headers(), params={"per_page": PER_PAGE, "page": page},
+        ) as resp:
+            if resp.status >= 400:
+                text = await resp.text()
+                raise RuntimeError(f"GitHub API error {resp.status}: {text}")
+            return await resp.json()
+
+    async def fetch_issues(
+        self,
+        repo: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        since: Optional[str] = None,
+    ) -> Optional[IssueListing]:
+        """Fetch list of issues for the repo.
+
+        The first page tells us how many pages there are (Link rel="last"),
+        the rest are fetched concurrently and stitched back together in order.
+        If etag / last_modified from a previous listing are given, page 1 is a
+        conditional request and None is returned when GitHub says 304 Not Modified.
+        Only single-page listings come back with validators, a 304 on page 1 says
+        nothing about the other pages.
+
+        With since (an ISO timestamp, e.g. the newest updated_at we have) only
+        issues updated at or after it come back, open *and* closed, so the caller
+        can merge them into what it has and drop the closed ones.
+        """
+        with GITHUB_FETCH_SECONDS.time(result="error") as outcome:
+            listing = await self._fetch_issues(repo, etag, last_modified, since)
+            outcome["result"] = "not_modified" if listing is None else ("delta" if since else "ok")
+        return listing
+
+    async def _fetch_issues(
+        self,
+        repo: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        since: Optional[str],
+    ) -> Optional[IssueListing]:
+        url = f"{self.base_url}/repos/{self.owner}/{repo}/issues"
+        params = {"since": since, "state": "all"} if since else None
+        conditional = {}
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+
+        first, issues = await self._get_page(repo, url, 1, conditional, params)
+        if issues is None:
+            return None
+
+        listing = IssueListing(
+            issues=issues,
+            etag=first.headers.get("ETag"),
+            last_modified=first.headers.get("Last-Modified"),
+        )
+
+        last_page = self._last_page(first)
+        if last_page <= 1:
+            return listing
+        # page 1's validators only cover page 1: an issue closed or deleted further
+        # down leaves it unchanged (304), so a multi-page listing is never revalidated
+        listing.etag = listing.last_modified = None
+
+        sem = asyncio.Semaphore(MAX_PAGE_WORKERS)
+
+        async def get(page: int):
+            async with sem:
+                _, body = await self._get_page(repo, url, page, extra_params=params)
+                return body
 
+        for body in await asyncio.gather(*(get(p) for p in range(2, last_page + 1))):
+            listing.issues.extend(body)
+        return listing
@@ -0,0 +1,191 @@
+import os, time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List
+
+from .issue_index import IssueIndex
+
+ISSUE_CACHE_TTL_SECONDS = float(os.getenv("ISSUE_CACHE_TTL_SECONDS", "60"))
+ISSUE_CACHE_MAX_REPOS = int(os.getenv("ISSUE_CACHE_MAX_REPOS", "64"))
+ISSUE_CACHE_MAX_ISSUES = int(os.getenv("ISSUE_CACHE_MAX_ISSUES", "50000"))
+# a repo that got a webhook this recently is kept up to date by push, skip revalidation
+ISSUE_CACHE_WEBHOOK_TTL_SECONDS = float(os.getenv("ISSUE_CACHE_WEBHOOK_TTL_SECONDS", "600"))
+# stale entries are caught up with `since` deltas, but a full listing is redone this often
+# (deltas can't see deleted / transferred issues)
+ISSUE_CACHE_FULL_SYNC_SECONDS = float(os.getenv("ISSUE_CACHE_FULL_SYNC_SECONDS", "3600"))
+
+
+@dataclass
+class CacheEntry:
+    issues: IssueIndex
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = field(default_factory=time.monotonic)
+    pushed_at: Optional[float] = None  # last webhook applied
+    high_water: Optional[str] = None  # newest updated_at we've fetched, next delta starts here
+    delta_etag: Optional[str] = None  # ETag of the last delta, good while high_water stays put
+    synced_at: float = field(default_factory=time.monotonic)  # last full listing
+
+
+class IssueCache:
+    """
+    Per-repo issue indexes (see IssueIndex) with the validators GitHub gave us.
+
+    - fresh (younger than ttl) entries are served without touching GitHub
+    - stale entries are revalidated with If-None-Match / If-Modified-Since, a 304 just
+      bumps fetched_at (and doesn't count against the rate limit)
+    - stale entries with a high-water mark are caught up with a delta (issues
+      updated since) until full_sync seconds have passed since the last full listing,
+      then the whole listing is fetched again unconditionally. The delta URL only
+      changes with the high-water mark, so its ETag is kept to revalidate the next one
+    - entries fed by webhooks stay fresh for webhook_ttl after the last event
+    - least recently used repos are evicted once we hold more than max_repos repos
+      or more than max_issues issues in total
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = ISSUE_CACHE_TTL_SECONDS,
+        max_repos: int = ISSUE_CACHE_MAX_REPOS,
+        max_issues: int = ISSUE_CACHE_MAX_ISSUES,
+        webhook_ttl_seconds: float = ISSUE_CACHE_WEBHOOK_TTL_SECONDS,
+        full_sync_seconds: float = ISSUE_CACHE_FULL_SYNC_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_repos = max_repos
+        self.max_issues = max_issues
+        self.webhook_ttl_seconds = webhook_ttl_seconds
+        self.full_sync_seconds = full_sync_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._issue_count = 0
+
+    def get(self, repo: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(repo)
+        if entry is not None:
+            self._entries.move_to_end(repo)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        now = time.monotonic()
+        if entry.pushed_at is not None and now - entry.pushed_at < self.webhook_ttl_seconds:
+            return True
+        return now - entry.fetched_at < self.ttl_seconds
+
+    def can_delta_sync(self, entry: CacheEntry) -> bool:
+        return entry.high_water is not None and not self.full_sync_due(entry)
+
+    def full_sync_due(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.synced_at >= self.full_sync_seconds
+
+    def put(
+        self,
+        repo: str,
+        issues: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CacheEntry:
+        entry = CacheEntry(
+            issues=IssueIndex(issues),
+            etag=etag,
+            last_modified=last_modified,
+            high_water=_high_water(issues),
+        )
+        self._store(repo, entry)
+        return entry
+
+    def merge(self, repo: str, changes: List[Dict[str, Any]], etag: Optional[str] = None) -> Optional[CacheEntry]:
+        """Apply a delta (issues updated since high_water, open and closed) to a cached repo."""
+        entry = self.get(repo)
+        if entry is None:
+            return None
+        for issue in changes:
+            self._apply(entry, issue)
+        since = entry.high_water
+        entry.high_water = _high_water(changes, since)
+        # a new high-water mark is a new delta URL, the old ETag doesn't apply to it
+        entry.delta_etag = etag if entry.high_water == since else None
+        entry.fetched_at = time.monotonic()
+        self._evict()
+        return entry
+
+    def touch(self, repo: str, revalidated: Optional[CacheEntry] = None) -> Optional[CacheEntry]:
+        """
+        Mark an entry as just revalidated (GitHub answered 304). If it was evicted
+        while the request was out, the revalidated entry is put back.
+        """
+        entry = self.get(repo)
+        if entry is None and revalidated is not None:
+            entry = revalidated
+            self._store(repo, entry)
+        if entry is not None:
+            entry.fetched_at = time.monotonic()
+        return entry
+
+    def upsert_issue(self, repo: str, issue: Dict[str, Any]) -> bool:
+        """Apply a pushed issue to a cached repo. False if the repo isn't cached (next read fetches it)."""
+        entry = self._entries.get(repo)
+        if entry is None:
+            return False
+        self._apply(entry, issue)
+        entry.pushed_at = time.monotonic()
+        self._evict()
+        return True
+
+    def remove_issue(self, repo: str, issue_number: int) -> bool:
+        entry = self._entries.get(repo)
+        if entry is None:
+            return False
+        if entry.issues.remove(issue_number):
+            self._issue_count -= 1
+        entry.pushed_at = time.monotonic()
+        return True
+
+    def _apply(self, entry: CacheEntry, issue: Dict[str, Any]):
+        before = entry.issues.size
+        # we only list open issues, a closed one leaves the listing
+        if issue.get("state") == "closed":
+            entry.issues.remove(issue["number"])
+        else:
+            entry.issues.add(issue)
+        self._issue_count += entry.issues.size - before
+
+    def _store(self, repo: str, entry: CacheEntry):
+        old = self._entries.pop(repo, None)
+        if old is not None:
+            self._issue_count -= old.issues.size
+        self._entries[repo] = entry
+        self._issue_count += entry.issues.size
+        self._evict()
+
+    def _evict(self):
+        # always keep the entry we just stored, even if it alone is over the cap
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_repos or self._issue_count > self.max_issues
+        ):
+            _, old = self._entries.popitem(last=False)
+            self._issue_count -= old.issues.size
+
+    # dict-style access to the issue index of a repo
+    def __contains__(self, repo: str) -> bool:
+        return repo in self._entries
+
+    def __getitem__(self, repo: str) -> IssueIndex:
+        return self._entries[repo].issues
+
+    def __setitem__(self, repo: str, issues: Dict[int, Dict[str, Any]]):
+        self._store(repo, CacheEntry(issues=IssueIndex(issues.values())))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._issue_count = 0
+
+
+def _high_water(issues: List[Dict[str, Any]], current: Optional[str] = None) -> Optional[str]:
+    # GitHub timestamps are all "YYYY-MM-DDTHH:MM:SSZ", so they compare as strings
+    stamps = [i["updated_at"] for i in issues if i.get("updated_at")]
+    if current:
+        stamps.append(current)
+    return max(stamps, default=None)
@@ -0,0 +1,184 @@
+import re, itertools
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Set, Tuple
+
+_EMPTY: frozenset = frozenset()
+_WORD = re.compile(r"\w+")
+# shared by all indexes, so a rebuilt index never reuses the version of the one it replaced
+_versions = itertools.count(1)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased words, for both indexing and searching."""
+    return _WORD.findall((text or "").lower())
+
+
+class Issue:
+    """The fields of a GitHub issue we actually use, without the rest of the JSON."""
+
+    __slots__ = (
+        "number", "title", "body", "state", "url", "labels", "assignees",
+        "created_at", "updated_at", "comments", "is_pr",
+    )
+
+    def __init__(
+        self,
+        number: int,
+        title: str = "",
+        body: Optional[str] = None,
+        state: str = "open",
+        url: str = "",
+        labels: Tuple[str, ...] = (),
+        assignees: Tuple[str, ...] = (),
+        created_at: Optional[str] = None,
+        updated_at: Optional[str] = None,
+        comments: int = 0,
+        is_pr: bool = False,
+    ):
+        self.number = number
+        self.title = title
+        self.body = body
+        self.state = state
+        self.url = url
+        self.labels = labels
+        self.assignees = assignees
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.comments = comments
+        self.is_pr = is_pr
+
+    @classmethod
+    def from_github(cls, raw: Dict[str, Any]) -> "Issue":
+        people = raw.get("assignees") or ([raw["assignee"]] if raw.get("assignee") else [])
+        return cls(
+            number=raw["number"],
+            title=raw.get("title") or "",
+            body=raw.get("body"),
+            state=raw.get("state") or "open",
+            url=raw.get("html_url") or "",
+            labels=tuple((l.get("name") if isinstance(l, dict) else l) or "" for l in raw.get("labels") or []),
+            assignees=tuple(p.get("login", "") for p in people if isinstance(p, dict)),
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            comments=raw.get("comments") or 0,
+            is_pr="pull_request" in raw,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """GitHub field names, e.g. for issue_content_hash."""
+        return {
+            "number": self.number,
+            "title": self.title,
+            "body": self.body,
+            "state": self.state,
+            "html_url": self.url,
+            "labels": list(self.labels),
+            "assignees": list(self.assignees),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "comments": self.comments,
+        }
+
+    def __repr__(self) -> str:
+        return f"Issue(#{self.number}, {self.state}, {self.title!r})"
+
+
+def _same(a: Issue, b: Issue) -> bool:
+    return all(getattr(a, f) == getattr(b, f) for f in Issue.__slots__)
+
+
+class IssueIndex:
+    """
+    One repo's issues as compact records, with the lookups GET /{repo}/issues needs.
+
+    PRs (the issues API lists them too) are split off at ingest, so iterating,
+    len() and `in` only see real issues. Besides number -> Issue we keep
+    label -> numbers and an inverted index word -> numbers over
+    title and body, all updated in place as issues come and go. `version` changes
+    with every add / remove that changes something, it's what the API's ETags are made of.
+    """
+
+    def __init__(self, issues: Iterable[Dict[str, Any]] = ()):
+        self._issues: Dict[int, Issue] = {}
+        self.pull_requests: Dict[int, Issue] = {}
+        self._by_label: Dict[str, Set[int]] = defaultdict(set)
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        for raw in issues:
+            self.add(raw)
+        self.version = next(_versions)
+
+    # container protocol: issues only, PRs live in pull_requests
+    def __contains__(self, number: int) -> bool:
+        return number in self._issues
+
+    def __getitem__(self, number: int) -> Issue:
+        return self._issues[number]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._issues)
+
+    def __len__(self) -> int:
+        return len(self._issues)
+
+    def values(self) -> Iterable[Issue]:
+        return self._issues.values()
+
+    def get(self, number: int) -> Optional[Issue]:
+        """Issue or PR with this number."""
+        return self._issues.get(number) or self.pull_requests.get(number)
+
+    @property
+    def size(self) -> int:
+        return len(self._issues) + len(self.pull_requests)
+
+    def add(self, raw: Dict[str, Any]) -> Issue:
+        """Insert or replace an issue from GitHub JSON. Re-adding it unchanged is a no-op."""
+        issue = Issue.from_github(raw)
+        current = self.get(issue.number)
+        if current is not None and _same(current, issue):
+            # e.g. the high-water issue every (inclusive) `since` delta returns again
+            return current
+        self.remove(issue.number)
+        self.version = next(_versions)
+        if issue.is_pr:
+            self.pull_requests[issue.number] = issue
+            return issue
+        self._issues[issue.number] = issue
+        for label in issue.labels:
+            self._by_label[label.lower()].add(issue.number)
+        for token in self._tokens(issue):
+            self._by_token[token].add(issue.number)
+        return issue
+
+    def remove(self, number: int) -> bool:
+        if self.pull_requests.pop(number, None) is not None:
+            self.version = next(_versions)
+            return True
+        issue = self._issues.pop(number, None)
+        if issue is None:
+            return False
+        self.version = next(_versions)
+        for label in issue.labels:
+            self._discard(self._by_label, label.lower(), number)
+        for token in self._tokens(issue):
+            self._discard(self._by_token, token, number)
+        return True
+
+    @staticmethod
+    def _tokens(issue: Issue) -> Set[str]:
+        return set(tokenize(issue.title)) | set(tokenize(issue.body))
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, number: int):
+        numbers = index.get(key)
+        if numbers is not None:
+            numbers.discard(number)
+            if not numbers:
+                del index[key]
+
+    # lookups, each returns a set of issue numbers
+    def with_label(self, label: str) -> Set[int]:
+        return self._by_label.get(label.lower(), _EMPTY)
+
+    def with_token(self, token: str) -> Set[int]:
+        return self._by_token.get(token, _EMPTY)
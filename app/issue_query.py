@@ -0,0 +1,174 @@
+import os, json, base64
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+from .issue_index import Issue, IssueIndex, tokenize
+
+ISSUES_PER_PAGE = int(os.getenv("ISSUES_PER_PAGE", "50"))
+ISSUES_MAX_PER_PAGE = int(os.getenv("ISSUES_MAX_PER_PAGE", "500"))
+
+DIRECTIONS = {"asc", "desc"}
+# sort key -> (Issue attribute, value used when it's missing)
+SORT_FIELDS = {
+    "number": ("number", 0),
+    "created": ("created_at", ""),
+    "updated": ("updated_at", ""),
+    "comments": ("comments", 0),
+}
+
+# what POST /{repo}/issues/details can return per issue, number is always included
+DETAIL_FIELDS = ("number", "title", "body", "state", "url", "labels", "assignees", "created_at", "updated_at", "comments")
+
+
+@dataclass
+class IssueQuery:
+    """
+    Filters, order and page of GET /{repo}/issues. Raises ValueError on bad parameters.
+    No state filter: the cache only holds open issues.
+    """
+    labels: List[str] = field(default_factory=list)  # issue must have all of them
+    assignee: Optional[str] = None                   # login, or "none" for unassigned
+    q: Optional[str] = None                          # every word must be in the title or body
+    sort: str = "number"
+    direction: str = "asc"
+    per_page: int = ISSUES_PER_PAGE
+    page: int = 1
+    cursor: Optional[str] = None                     # next_cursor of the previous page, wins over page
+
+    def __post_init__(self):
+        if self.sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {sorted(SORT_FIELDS)}")
+        if self.direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {sorted(DIRECTIONS)}")
+        if not 1 <= self.per_page <= ISSUES_MAX_PER_PAGE:
+            raise ValueError(f"per_page must be between 1 and {ISSUES_MAX_PER_PAGE}")
+        if self.page < 1:
+            raise ValueError("page must be >= 1")
+        self.labels = [l.strip().lower() for l in self.labels if l.strip()]
+
+    def sort_key(self, issue: Issue) -> Tuple[Any, int]:
+        name, missing = SORT_FIELDS[self.sort]
+        value = getattr(issue, name)
+        return (missing if value is None else value, issue.number)
+
+    def candidates(self, index: IssueIndex) -> List[Issue]:
+        """Issues matching the filters, narrowed down with the index (smallest set first)."""
+        sets = [index.with_label(l) for l in self.labels]
+        sets.extend(index.with_token(t) for t in tokenize(self.q))
+        if sets:
+            sets.sort(key=len)
+            numbers = set(sets[0]).intersection(*sets[1:])
+            found = (index[n] for n in numbers)
+        else:
+            found = index.values()
+
+        if not self.assignee:
+            return list(found)
+        wanted = self.assignee.lower()
+        if wanted == "none":
+            return [i for i in found if not i.assignees]
+        return [i for i in found if wanted in (a.lower() for a in i.assignees)]
+
+    # cursors are (sort, direction, last key) so they can't be replayed against another order
+    def encode_cursor(self, key: Tuple[Any, int]) -> str:
+        raw = json.dumps([self.sort, self.direction, list(key)]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(self) -> Tuple[Any, int]:
+        try:
+            padded = self.cursor + "=" * (-len(self.cursor) % 4)
+            sort, direction, key = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise ValueError("invalid cursor")
+        if sort != self.sort or direction != self.direction:
+            raise ValueError("cursor belongs to a different sort order")
+        # (sort value, number), typed like sort_key's so bisect never compares e.g. str with int
+        kind = type(SORT_FIELDS[self.sort][1])
+        if not (isinstance(key, list) and len(key) == 2
+                and all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(key, (kind, int)))):
+            raise ValueError("invalid cursor")
+        return tuple(key)
+
+
+def summarize(issue: Issue) -> Dict[str, Any]:
+    return {
+        "number": issue.number,
+        "title": issue.title,
+        "state": issue.state,
+        "url": issue.url,
+        "labels": list(issue.labels),
+    }
+
+
+def detail_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Validated field projection (None = everything). Raises ValueError on unknown fields."""
+    if not fields:
+        return DETAIL_FIELDS
+    wanted = {f.strip() for f in fields if f.strip()}
+    unknown = wanted - set(DETAIL_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields {sorted(unknown)}, pick from {list(DETAIL_FIELDS)}")
+    return tuple(f for f in DETAIL_FIELDS if f == "number" or f in wanted)
+
+
+def details(fields: Tuple[str, ...] = DETAIL_FIELDS) -> Callable[[Issue], Dict[str, Any]]:
+    """Issue -> dict with just these fields (the full issue, body included, by default)."""
+    def render(issue: Issue) -> Dict[str, Any]:
+        out = {}
+        for f in fields:
+            value = getattr(issue, f)
+            if isinstance(value, tuple):
+                value = list(value)
+            elif f == "body":
+                value = value or ""
+            out[f] = value
+        return out
+    return render
+
+
+def query_issues(
+    index: IssueIndex, query: IssueQuery, render: Callable[[Issue], Dict[str, Any]] = summarize,
+) -> Dict[str, Any]:
+    """Filter, sort and cut one page out of a repo's issues."""
+    ordered = sorted(query.candidates(index), key=query.sort_key)
+    return paginate(ordered, query, render)
+
+
+def all_matching(index: IssueIndex, query: IssueQuery) -> List[Issue]:
+    """Every issue matching the filters in the requested order, no paging (for streaming)."""
+    return sorted(query.candidates(index), key=query.sort_key, reverse=query.direction == "desc")
+
+
+def paginate(
+    ordered: List[Issue], query: IssueQuery, render: Callable[[Issue], Dict[str, Any]] = summarize,
+) -> Dict[str, Any]:
+    """One page of issues already filtered and sorted ascending by query.sort_key."""
+    total = len(ordered)
+    keys = [query.sort_key(i) for i in ordered]
+    descending = query.direction == "desc"
+
+    if query.cursor:
+        after = query.decode_cursor()
+        # keyset: everything strictly past the last issue of the previous page
+        start = total - bisect_left(keys, after) if descending else bisect_right(keys, after)
+    else:
+        start = (query.page - 1) * query.per_page
+    end = min(start + query.per_page, total)
+
+    if descending:
+        picked = ordered[total - end:total - start][::-1] if start < total else []
+    else:
+        picked = ordered[start:end]
+
+    data = {
+        "issues": [render(i) for i in picked],
+        "total": total,
+        "per_page": query.per_page,
+        "has_more": end < total,
+        "next_cursor": query.encode_cursor(query.sort_key(picked[-1])) if picked and end < total else None,
+    }
+    if not query.cursor:
+        data["page"] = query.page
+        data["pages"] = max(1, -(-total // query.per_page))
+    return data
@@ -0,0 +1,154 @@
+import os, time, uuid, asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Tuple
+
+# finished jobs we keep around for late pollers, oldest are dropped first
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "200"))
+# idle subscribers get a keep-alive this often so proxies don't drop the stream
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+# event emitted when an issue finishes, by result status. These carry the full result,
+# progress events (scoping_started, action_plan, implementing_started) don't.
+# "scoped" only comes from scope-only jobs (webhook auto-scope).
+RESULT_EVENTS = {"success": "pr_opened", "failed": "failed", "skipped": "skipped", "scoped": "scoped"}
+
+
+@dataclass
+class BatchJob:
+    id: str
+    repo: str
+    targets: List[int]
+    status: str = "queued"          # queued | running | finished | failed
+    results: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    # progress log, event ids are 1-based positions in it
+    events: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    _wakeup: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in {"finished", "failed"}
+
+    def record(self, result: Dict[str, Any]):
+        self.results[result["issue_number"]] = result
+        self.emit(RESULT_EVENTS.get(result["status"], "failed"), issue_number=result["issue_number"], result=result)
+
+    def emit(self, type: str, **data):
+        self.events.append({"id": len(self.events) + 1, "type": type, **data})
+        # wake everyone waiting on the old event, new waiters get a fresh one
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def follow(self, after: int = 0, heartbeat: float = EVENT_HEARTBEAT_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events with id > after as they happen, until the job is done.
+        Yields None when nothing happened for `heartbeat` seconds.
+        """
+        while True:
+            wakeup = self._wakeup
+            while after < len(self.events):
+                after += 1
+                yield self.events[after - 1]
+            if self.done:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+    def snapshot(self, include_results: bool = True) -> Dict[str, Any]:
+        results = [self.results[n] for n in self.targets if n in self.results]
+        data = {
+            "job_id": self.id,
+            "repo": self.repo,
+            "status": self.status,
+            "total_selected": len(self.targets),
+            "completed": len(results),
+            "succeeded": sum(1 for r in results if r["status"] == "success"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_results:
+            data["results"] = results
+        return data
+
+
+class JobManager:
+    """In-process registry of batch jobs, each one runs as its own asyncio task."""
+
+    def __init__(self, history: int = JOB_HISTORY):
+        self.history = history
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        # (repo, issue number) -> id of the job working on it, see claim()
+        self._claims: Dict[Tuple[str, int], str] = {}
+
+    def create(self, repo: str, targets: List[int], runner: Callable[[BatchJob], Awaitable[None]]) -> BatchJob:
+        job = BatchJob(id=uuid.uuid4().hex, repo=repo, targets=list(targets))
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, runner))
+        self._prune()
+        return job
+
+    async def _run(self, job: BatchJob, runner: Callable[[BatchJob], Awaitable[None]]):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            await runner(job)
+            job.status = "finished"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            # per-issue failures are results, this is the batch itself blowing up
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self.release(job)
+            job.finished_at = time.time()
+            job.emit("job_finished", job=job.snapshot(include_results=False))
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+
+    def list(self, repo: Optional[str] = None) -> List[BatchJob]:
+        return [j for j in self._jobs.values() if repo is None or j.repo == repo]
+
+    def pending_issues(self) -> int:
+        """Issues of unfinished jobs that don't have a result yet (the batch queue depth)."""
+        return sum(len(j.targets) - len(j.results) for j in self._jobs.values() if not j.done)
+
+    def claim(self, job: BatchJob, issue_number: int) -> Optional[BatchJob]:
+        """
+        Mark the issue as worked on by job. If a live job already has it (another
+        one, or this one through a repeated target), nothing is claimed and that job is returned.
+        """
+        key = (job.repo, issue_number)
+        owner = self._jobs.get(self._claims.get(key, ""))
+        if owner is not None and not owner.done:
+            return owner
+        self._claims[key] = job.id
+        return None
+
+    def release(self, job: BatchJob, issue_number: Optional[int] = None):
+        """Give up job's claim on the issue, or on all its issues."""
+        for key, owner in list(self._claims.items()):
+            if owner == job.id and (issue_number is None or key == (job.repo, issue_number)):
+                del self._claims[key]
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.done]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def clear(self):
+        self._jobs.clear()
+        self._claims.clear()
@@ -1,23 +1,73 @@
-import os, aiohttp
-from typing import Dict, Any, List, Optional
+import os, json, uuid, itertools, aiohttp
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from dataclasses import dataclass
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from starlette.responses import Response
+from starlette.responses import JSONResponse, StreamingResponse, PlainTextResponse, Response
 
-from .github_client import fetch_issues  
+from .github_client import GitHubClient, OWNER
 from .devin_client import DevinClient
+from .issue_cache import IssueCache
+from .jobs import JobManager, BatchJob
+from .access_log import AccessLogMiddleware
+from .store import ResultStore, IssueRecord, issue_content_hash
+from .pipeline import run_two_stage
+from .scheduler import SessionScheduler, label_priority
+from .issue_query import (
+    IssueQuery, ISSUES_PER_PAGE, ISSUES_MAX_PER_PAGE, query_issues, all_matching, summarize, detail_fields, details,
+)
+from .streaming import wants_ndjson, ndjson_response
+from .issue_index import Issue, IssueIndex
+from .singleflight import SingleFlight
+from . import webhooks, metrics
+
+try:  # optional: pip install brotli-asgi for br, gzip is always there
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 class BatchScopeExecuteRequest(BaseModel):
     all: bool = False                 # run on all 
     issues: Optional[List[int]] = None  # or run on these issue numbers
+    force: bool = False               # ignore stored results and start over
+    priority: int = 0                 # higher goes first in the session scheduler (labels add to it)
+    caller: Optional[str] = None      # who's asking, for fair share (default: X-Caller header or client ip)
+
+class IssueDetailsRequest(BaseModel):
+    issues: Optional[List[int]] = None  # these issue numbers, in this order
+    # or a filter, same as GET /{repo}/issues
+    labels: List[str] = []
+    assignee: Optional[str] = None
+    q: Optional[str] = None
+    sort: str = "number"
+    direction: str = "asc"
+    per_page: int = ISSUES_PER_PAGE
+    page: int = 1
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None  # projection, default all of DETAIL_FIELDS
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+# per batch: scoping is short and cheap, implementing is long and expensive,
+# so each stage gets its own worker pool and timeout. Size them to the Devin session quota.
+SCOPE_CONCURRENCY = int(os.getenv("SCOPE_CONCURRENCY", "8"))
+IMPLEMENT_CONCURRENCY = int(os.getenv("IMPLEMENT_CONCURRENCY", os.getenv("BATCH_CONCURRENCY", "4")))
+SCOPE_TIMEOUT_SECONDS = int(os.getenv("SCOPE_TIMEOUT_SECONDS", "600"))
+IMPLEMENT_TIMEOUT_SECONDS = int(os.getenv("IMPLEMENT_TIMEOUT_SECONDS", "900"))
+# responses smaller than this go out uncompressed, not worth the CPU
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    headers = {"Authorization": f"Bearer {os.getenv('DEVIN_API_KEY')}"}
-    app.state.http = aiohttp.ClientSession(headers=headers)
-    app.state.devin = DevinClient(app.state.http)
+    # one pooled keep-alive session for both GitHub and Devin, auth headers are per client
+    app.state.http = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE))
+    app.state.github = GitHubClient(app.state.http)
+    app.state.scheduler = SessionScheduler()
+    app.state.devin = DevinClient(app.state.http, scheduler=app.state.scheduler)
+    _results.prune_scope_cache()
     yield                           
     await app.state.http.close() 
 
@@ -32,191 +82,585 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
-async def log_responses(request: Request, call_next):
-    response = await call_next(request)
-
-    chunks = [chunk async for chunk in response.body_iterator]
-    body = b"".join(chunks)
-
-    try:
-        print(f"Response for {request.url}: {body.decode('utf-8', errors='replace')}")
-    except Exception:
-        print(f"Response for {request.url}: <non-text {len(body)} bytes>")
-
-    return Response(
-        content=body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=getattr(response, "media_type", None),
+# gzip (or brotli when installed) by Accept-Encoding. Streaming responses are compressed
+# chunk by chunk and flushed, event streams are left alone so events aren't held back
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True,
+                       excluded_handlers=[r"/jobs/[^/]+/events"])
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# structured access log, never reads the response body into memory (outermost, so it counts bytes on the wire)
+app.add_middleware(AccessLogMiddleware)
+
+# in-memory cache: repo -> IssueIndex, revalidated with ETags / caught up with deltas
+_repo_issues_cache = IssueCache()
+
+# background scope-and-execute batches
+_jobs = JobManager()
+
+# in-flight GitHub fetches by repo, see _load_issues
+_issue_loads = SingleFlight()
+
+# what Devin already did per issue (sqlite, RESULT_STORE_PATH)
+_results = ResultStore()
+
+# read at scrape time
+metrics.Gauge("devin_sessions_active", "Devin sessions holding a scheduler slot",
+              lambda: app.state.scheduler.stats()["active"])
+metrics.Gauge("devin_sessions_queued", "Devin sessions waiting for a scheduler slot",
+              lambda: app.state.scheduler.stats()["queued"])
+metrics.Gauge("devin_sessions_watched", "Devin sessions being polled",
+              lambda: app.state.devin.watcher.active)
+metrics.Gauge("batch_pending_issues", "Issues in running batch jobs without a result yet",
+              _jobs.pending_issues)
+
+async def _load_issues(repo: str) -> IssueIndex:
+    """Issues of a repo, from the cache while fresh, otherwise caught up / revalidated against GitHub."""
+    entry = _repo_issues_cache.get(repo)
+    if entry is not None and _repo_issues_cache.is_fresh(entry):
+        metrics.ISSUE_CACHE_REQUESTS.inc(result="hit")
+        return entry.issues
+
+    # a burst of requests for the same repo shares one upstream fetch
+    if _issue_loads.in_flight(repo):
+        metrics.ISSUE_CACHE_REQUESTS.inc(result="coalesced")
+    return await _issue_loads.do(repo, lambda: _refresh_issues(repo))
+
+async def _refresh_issues(repo: str) -> IssueIndex:
+    entry = _repo_issues_cache.get(repo)
+    if entry is not None and _repo_issues_cache.can_delta_sync(entry):
+        # only what changed since the newest updated_at we have, usually one small page.
+        # `since` is inclusive, so an unchanged repo answers the last delta's ETag with a 304
+        changes = await app.state.github.fetch_issues(repo, etag=entry.delta_etag, since=entry.high_water)
+        if changes is None:
+            metrics.ISSUE_CACHE_REQUESTS.inc(result="not_modified")
+            return _repo_issues_cache.touch(repo, entry).issues
+        merged = _repo_issues_cache.merge(repo, changes.issues, changes.etag)
+        if merged is not None:  # evicted meanwhile -> full listing below
+            metrics.ISSUE_CACHE_REQUESTS.inc(result="delta")
+            return merged.issues
+
+    # the periodic full listing is there to catch deleted / transferred issues,
+    # a 304 on page 1 doesn't tell us about those, so it goes out unconditionally
+    if entry is not None and _repo_issues_cache.full_sync_due(entry):
+        entry = None
+    listing = await app.state.github.fetch_issues(
+        repo,
+        etag=entry.etag if entry else None,
+        last_modified=entry.last_modified if entry else None,
     )
-
-
-
-# in-memory cache: 
-_repo_issues_cache: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    if listing is None:  # 304, what we have is still good (even if evicted meanwhile)
+        metrics.ISSUE_CACHE_REQUESTS.inc(result="not_modified")
+        return _repo_issues_cache.touch(repo, entry).issues
+
+    metrics.ISSUE_CACHE_REQUESTS.inc(result="miss")
+    return _repo_issues_cache.put(repo, listing.issues, listing.etag, listing.last_modified).issues
+
+# index versions restart with the process, the boot id keeps old ETags from matching
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+def _versioned(request: Request, index: IssueIndex, build: Callable[[], Any]) -> Response:
+    """
+    JSON (or whatever response build() makes) with an ETag of the repo's index version,
+    or 304 if the client already has it. The index changes as a whole, so a list page
+    and a single issue share the same tag.
+    """
+    etag = f'W/"{_BOOT_ID}-{index.version}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    body = build()
+    if isinstance(body, Response):
+        body.headers["ETag"] = etag
+        return body
+    return JSONResponse(body, headers={"ETag": etag})
 
 # endpoints
-# list of issues
+# list of issues: filtered, sorted and paged out of the cached listing
 @app.get("/{repo}/issues")
-def get_issues(repo: str):
+async def get_issues(
+    repo: str,
+    request: Request,
+    labels: Optional[str] = None,     # comma separated, all must match
+    assignee: Optional[str] = None,   # login or "none"
+    q: Optional[str] = None,          # words in title / body
+    sort: str = "number",             # number | created | updated | comments
+    direction: str = "asc",
+    per_page: int = ISSUES_PER_PAGE,
+    page: int = 1,
+    cursor: Optional[str] = None,
+):
     try:
-        data = fetch_issues(repo)
-        _repo_issues_cache[repo] = {issue["number"]: issue for issue in data}
+        query = IssueQuery(
+            labels=labels.split(",") if labels else [],
+            assignee=assignee,
+            q=q,
+            sort=sort,
+            direction=direction,
+            per_page=per_page,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        index = await _load_issues(repo)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    if not data:
-        return {"message": f"The repository '{repo}' has no issues"}
-
-    issues = [
-
-        {"number": issue["number"], 
-         "title": issue["title"], 
-         "state": issue["state"], 
-         "url": issue["html_url"]}
+    if wants_ndjson(request):
+        # every match, one summary per line, no paging
+        return _versioned(request, index, lambda: _stream_issues(all_matching(index, query), summarize))
 
-        for issue in data if "pull_request" not in issue
-    ]
-    return {"issues": issues}
+    if not index:
+        return {"message": f"The repository '{repo}' has no issues"}
+    try:
+        return _versioned(request, index, lambda: query_issues(index, query))
+    except ValueError as e:  # bad cursor
+        raise HTTPException(status_code=400, detail=str(e))
 
 # issue-specific info
 @app.get("/{repo}/issues/{issue_number}")
-def get_issue(repo: str, issue_number: int):
+async def get_issue(repo: str, issue_number: int, request: Request):
     try:
-        issues = fetch_issues(repo)  # ensures repo exists
+        repo_cache = await _load_issues(repo)  # ensures repo exists
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check repo '{repo}': {e}")
 
+    if issue_number in repo_cache.pull_requests:
+        raise HTTPException(status_code=404, detail="This is a pull request, not an issue")
+
     # If repo exists but no issues at all
-    if not issues:
+    if not repo_cache:
         raise HTTPException(
             status_code=404,
             detail=f"The repository '{repo}' has no issues"
         )
-    
-    repo_cache = _repo_issues_cache.get(repo)
-    
-    if not repo_cache or issue_number not in repo_cache:
-        raise HTTPException(status_code=404, detail="Issue not found. Issue doesn’t exist or call /repo/issues")
-    
-    
+
+    if issue_number not in repo_cache:
+        raise HTTPException(status_code=404, detail="Issue not found. Issue doesn’t exist in this repository")
+
     issue = repo_cache[issue_number]
-    if "pull_request" in issue:
-        raise HTTPException(status_code=404, detail="This is a pull request, not an issue")
-    return {
-        "number": issue["number"],
-        "title": issue["title"],
-        "body": issue.get("body", ""),
-        "state": issue["state"],
-        "url": issue["html_url"],
-    }
+    return _versioned(request, repo_cache, lambda: {
+        "number": issue.number,
+        "title": issue.title,
+        "body": issue.body or "",
+        "state": issue.state,
+        "url": issue.url,
+    })
+
+# full details (bodies included) of many issues in one call, picked by number or by filter
+@app.post("/{repo}/issues/details")
+async def get_issue_details(repo: str, body: IssueDetailsRequest, request: Request):
+    try:
+        render = details(detail_fields(body.fields))
+        query = None if body.issues is not None else IssueQuery(
+            labels=body.labels,
+            assignee=body.assignee,
+            q=body.q,
+            sort=body.sort,
+            direction=body.direction,
+            per_page=body.per_page,
+            page=body.page,
+            cursor=body.cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if body.issues is not None and len(body.issues) > ISSUES_MAX_PER_PAGE:
+        raise HTTPException(status_code=400, detail=f"at most {ISSUES_MAX_PER_PAGE} issues per request")
+
+    try:
+        index = await _load_issues(repo)  # one cached listing for all of them
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if wants_ndjson(request):
+        if query is None:
+            # keeps the order asked for, unknown numbers / PRs get a {"number", "missing"} line
+            rows = (render(index[n]) if n in index else {"number": n, "missing": True} for n in body.issues)
+            return ndjson_response(rows)
+        return _stream_issues(all_matching(index, query), render)
+
+    if query is None:
+        # PRs and unknown numbers are reported back instead of failing the whole call
+        return {
+            "issues": [render(index[n]) for n in body.issues if n in index],
+            "missing": [n for n in body.issues if n not in index],
+        }
+    try:
+        return query_issues(index, query, render)
+    except ValueError as e:  # bad cursor
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _stream_issues(issues: List[Issue], render: Callable[[Issue], Dict[str, Any]]) -> Response:
+    return ndjson_response((render(i) for i in issues), headers={"X-Total-Count": str(len(issues))})
 
 # Army of Devins : scope (Devin i.1) and execute (Devin i.2) for all issues or specific number of issues
 @app.post("/{repo}/issues/scope-and-execute-batch")
 async def scope_and_execute_batch(
     repo: str,
-    body: BatchScopeExecuteRequest
+    body: BatchScopeExecuteRequest,
+    request: Request,
 ):
     try:
-        issues = fetch_issues(repo)  # ensures repo exists
+        repo_cache = await _load_issues(repo)  # ensures repo exists
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check repo '{repo}': {e}")
     
     # If repo exists but no issues at all
-    if not issues:
+    if not repo_cache:
         raise HTTPException(
             status_code=404,
             detail=f"The repository '{repo}' has no issues"
         )
 
-    repo_cache: Dict[int, Dict[str, Any]] = _repo_issues_cache[repo]
-
     if body.all:
-        targets = [n for n, it in repo_cache.items() if "pull_request" not in it]
-        targets.sort()
+        targets = sorted(repo_cache)  # PRs aren't in the index
     else:
-        targets = body.issues or []
-        
-    results = []
-    succeeded = failed = 0
-    
+        targets = list(dict.fromkeys(body.issues or []))  # each issue once, in the order asked
     for issue_number in targets:
-        if not repo_cache or issue_number not in repo_cache:
-            raise HTTPException(status_code=404, detail="Issue not found. Issue doesn’t exist or call /repo/issues")
-        issue = repo_cache[issue_number] 
+        if repo_cache.get(issue_number) is None:
+            raise HTTPException(status_code=404, detail="Issue not found. Issue doesn’t exist in this repository")
+
+    issues = {n: repo_cache.get(n) for n in targets}
+    caller = body.caller or request.headers.get("x-caller") or (request.client.host if request.client else "anonymous")
+
+    # the batch keeps running in the background, clients poll /jobs/{job_id} or follow /jobs/{job_id}/events
+    job = _start_batch(repo, issues, targets, force=body.force, priority=body.priority, caller=caller)
+    metrics.BATCH_JOBS.inc()
+    metrics.BATCH_ISSUES.inc(len(targets))
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "repo": repo,
+            "status": job.status,
+            "total_selected": len(targets),
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+        },
+    )
 
-        # Skip PRs
-        if "pull_request" in issue:
-            results.append({
-                "issue_number": issue_number,
-                "status": "skipped",
-                "reason": "pull request"
-            })
-            continue
+def _start_batch(
+    repo: str,
+    issues: Dict[int, Issue],
+    targets: List[int],
+    force: bool = False,
+    priority: int = 0,
+    caller: str = "anonymous",
+    scope_only: bool = False,
+) -> BatchJob:
+    """Start a background job running the scope -> implement pipeline on targets."""
+
+    async def run_batch(job: BatchJob):
+        async def scope(n: int):
+            # an issue another running job is on is left to it: its stored session is
+            # that job's, not one to reattach to, and two implementers would open two PRs
+            owner = _jobs.claim(job, n)
+            if owner is not None:
+                return {
+                    "issue_number": n,
+                    "status": "skipped",
+                    "reason": f"in progress in job {owner.id}",
+                }, None
+            return await _scope_stage(
+                repo, n, issues[n], job.emit,
+                force=force,
+                priority=priority + label_priority(issues[n].labels),
+                caller=caller,
+            )
 
-        issue_title = issue.get("title", f"Issue #{issue_number}")
+        def on_result(result: Dict[str, Any]):
+            _jobs.release(job, result["issue_number"])
+            job.record(result)
+
+        # scopers feed action plans to implementers, each pool has its own limit
+        await run_two_stage(
+            job.targets,
+            scope=scope,
+            implement=_plan_only if scope_only else (lambda item: _implement_stage(item, job.emit)),
+            on_result=on_result,
+            scope_workers=SCOPE_CONCURRENCY,
+            implement_workers=1 if scope_only else IMPLEMENT_CONCURRENCY,
+        )
+
+    return _jobs.create(repo, targets, run_batch)
+
+def _no_events(type: str, **data):
+    pass
+
+@dataclass
+class _ScopedIssue:
+    """An issue with an action plan, handed from the scoper pool to the implementer pool."""
+    repo: str
+    issue_number: int
+    issue_title: str
+    scoped: Dict[str, Any]
+    action_plan: List[str]
+    stored: Optional[IssueRecord]
+    priority: int = 0
+    caller: str = "anonymous"
+    issue: Optional[Issue] = None
+
+def _failed(repo: str, issue_number: int, error: str) -> Dict[str, Any]:
+    try:
+        _results.save_failure(repo, issue_number, error)
+    except Exception as e:  # the stages never raise, the job still gets the failure
+        print(f"[store] could not record failure of {repo}#{issue_number}: {e}")
+    return {
+        "issue_number": issue_number,
+        "status": "failed",
+        "error": error
+    }
+
+def _on_session(repo: str, issue_number: int, stage: str):
+    return lambda session_id: _results.session_started(repo, issue_number, stage, session_id)
+
+async def _scope_stage(
+    repo: str,
+    issue_number: int,
+    issue: Issue,
+    emit: Callable[..., None] = _no_events,
+    force: bool = False,
+    priority: int = 0,
+    caller: str = "anonymous",
+) -> Tuple[Optional[Dict[str, Any]], Optional[_ScopedIssue]]:
+    """
+    Stage one: get an action plan. Returns (result, None) when the issue is already
+    finished here (PR, skipped, failed) or (None, scoped issue) for the implementers.
+    Never raises.
+
+    Picks up from the result store: issues that already have a PR are returned as is,
+    a cached action plan for unchanged issue content skips the scoper, and sessions
+    started before a restart are reattached instead of paid for again (issues a live
+    job holds never get here, see _start_batch).
+    force=True ignores what's stored.
+    """
+    # Skip PRs
+    if issue.is_pr:
+        return {
+            "issue_number": issue_number,
+            "status": "skipped",
+            "reason": "pull request"
+        }, None
+
+    issue_title = issue.title or f"Issue #{issue_number}"
 
-        try:
+    try:
+        stored = None if force else _results.get(repo, issue_number)
+        if stored is not None and stored.has_pr:
+            return {
+                "issue_number": issue_number,
+                "status": "success",
+                "scoped": stored.scoped,
+                "executed": stored.executed,
+                "resumed": True,
+            }, None
+
+        content_hash = issue_content_hash(issue.to_dict())
+
+        # same title / body / updated_at as last time -> the plan we got then is still good
+        scoped = None if force else _results.cached_scope(repo, issue_number, content_hash)
+        from_cache = scoped is not None
+        if not from_cache:
+            emit("scoping_started", issue_number=issue_number)
+            comments = await _issue_comments(repo, issue)
             scoped = await app.state.devin.scope_issue(
                 repo=repo,
                 issue_number=issue_number,
                 issue_title=issue_title,
+                max_wait_seconds=SCOPE_TIMEOUT_SECONDS,
+                session_id=stored.scope_session_id if stored and stored.status == "scoping" else None,
+                on_session=_on_session(repo, issue_number, "scope"),
+                priority=priority,
+                caller=caller,
+                issue=issue,
+                comments=comments,
             )
 
             action_plan = scoped.get("action_plan") if isinstance(scoped, dict) else None
             if not action_plan or not isinstance(action_plan, list):
-                results.append({
-                    "issue_number": issue_number,
-                    "status": "failed",
-                    "error": "Scoper did not return a valid action_plan"
-                })
-                failed += 1
-                continue
+                return _failed(repo, issue_number, "Scoper did not return a valid action_plan"), None
+            _results.save_scope(repo, issue_number, scoped, content_hash)
 
-            action_plan = [str(s).strip() for s in action_plan if str(s).strip()]
+    except TimeoutError as e:
+        return _failed(repo, issue_number, f"Timeout: {e}"), None
 
-            executed = await app.state.devin.implement_issue(
-                repo=repo,
-                issue_number=issue_number,
-                issue_title=issue_title,
-                action_plan=action_plan,
-            )
-
-            results.append({
-                "issue_number": issue_number,
-                "status": "success",
-                "scoped": scoped,
-                "executed": executed
-            })
-            succeeded += 1
+    except Exception as e:
+        return _failed(repo, issue_number, str(e)), None
 
-        except TimeoutError as e:
-            results.append({
-                "issue_number": issue_number,
-                "status": "failed",
-                "error": f"Timeout: {e}"
-            })
-            failed += 1
+    action_plan = [str(s).strip() for s in scoped["action_plan"] if str(s).strip()]
+    emit("action_plan", issue_number=issue_number, summary=scoped.get("summary"), action_plan=action_plan,
+         cached=from_cache)
+    return None, _ScopedIssue(repo, issue_number, issue_title, scoped, action_plan, stored, priority, caller, issue)
 
-        except Exception as e:
-            results.append({
-                "issue_number": issue_number,
-                "status": "failed",
-                "error": str(e)
-            })
-            failed += 1
+async def _issue_comments(repo: str, issue: Issue) -> List[Dict[str, Any]]:
+    """The issue's comments for the scoper prompt. Nice to have, so any failure just means none."""
+    if not issue.comments:
+        return []
+    try:
+        return await app.state.github.fetch_comments(repo, issue.number, issue.comments)
+    except Exception as e:
+        print(f"[github] comments of {repo}#{issue.number} unavailable, scoping without them: {e}")
+        return []
 
+async def _plan_only(item: _ScopedIssue) -> Dict[str, Any]:
+    """Stand-in implement stage for scope-only jobs, the plan stays cached for a later batch."""
     return {
-        "repo": f"{repo}",
-        "total_selected": len(targets),
-        "succeeded": succeeded,
-        "failed": failed,
-        "results": results,
+        "issue_number": item.issue_number,
+        "status": "scoped",
+        "scoped": item.scoped,
     }
+
+async def _implement_stage(item: _ScopedIssue, emit: Callable[..., None] = _no_events) -> Dict[str, Any]:
+    """Stage two: have Devin implement the plan and open the PR. Never raises."""
+    stored = item.stored
+    try:
+        emit("implementing_started", issue_number=item.issue_number)
+        executed = await app.state.devin.implement_issue(
+            repo=item.repo,
+            issue_number=item.issue_number,
+            issue_title=item.issue_title,
+            action_plan=item.action_plan,
+            max_wait_seconds=IMPLEMENT_TIMEOUT_SECONDS,
+            session_id=stored.implement_session_id if stored and stored.status == "implementing" else None,
+            on_session=_on_session(item.repo, item.issue_number, "implement"),
+            priority=item.priority,
+            caller=item.caller,
+            issue=item.issue,
+        )
+        _results.save_execution(item.repo, item.issue_number, executed)
+
+        return {
+            "issue_number": item.issue_number,
+            "status": "success",
+            "scoped": item.scoped,
+            "executed": executed
+        }
+
+    except TimeoutError as e:
+        return _failed(item.repo, item.issue_number, f"Timeout: {e}")
+
+    except Exception as e:
+        return _failed(item.repo, item.issue_number, str(e))
+
+# GitHub `issues` webhooks keep the cached listings current without refetching
+@app.post("/webhooks/github")
+async def github_webhook(request: Request):
+    raw = await request.body()
+    if not webhooks.GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not configured")
+    if not webhooks.verify_signature(webhooks.GITHUB_WEBHOOK_SECRET, raw, request.headers.get("x-hub-signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    event = request.headers.get("x-github-event")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "issues":
+        return {"status": "ignored", "event": event}
+
+    try:
+        payload = json.loads(raw)
+        repo = payload["repository"]["name"]
+        owner = payload["repository"]["owner"]["login"]
+        action = payload["action"]
+        issue = payload["issue"]
+        issue_number = issue["number"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Malformed issues event")
+
+    if OWNER and owner.lower() != OWNER.lower():
+        return {"status": "ignored", "reason": f"not an {OWNER} repository"}
+
+    applied = webhooks.apply_issue_event(_repo_issues_cache, repo, action, issue)
+    response = {"status": "applied" if applied else "not_cached", "action": action, "issue_number": issue_number}
+
+    if webhooks.WEBHOOK_AUTO_SCOPE and action == "opened" and "pull_request" not in issue:
+        job = _start_batch(repo, {issue_number: Issue.from_github(issue)}, [issue_number], caller="webhook", scope_only=True)
+        response["job_id"] = job.id
+    return response
+
+# does the repo exist? answered from the issue cache when we have it, otherwise one
+# small GitHub call (no issue listing). Not plain /{repo}, /metrics, /jobs etc. would shadow it,
+# and declared before /jobs/{job_id} so /jobs/exists checks a repo called jobs.
+@app.get("/{repo}/exists")
+async def get_repo(repo: str):
+    entry = _repo_issues_cache.get(repo)
+    if entry is not None:
+        return {"repo": repo, "exists": True, "cached": True, "open_issues": len(entry.issues)}
+    try:
+        exists = await app.state.github.repo_exists(repo)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to check repo '{repo}': {e}")
+    if not exists:
+        raise HTTPException(status_code=404, detail=f"Repository '{repo}' not found")
+    return {"repo": repo, "exists": True, "cached": False, "open_issues": None}
+
+# stored scoping / implementation results, they survive restarts
+@app.get("/{repo}/results")
+async def get_results(repo: str):
+    return {"repo": repo, "results": [r.to_dict() for r in _results.list(repo)]}
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Devin session scheduler: capacity, queue depth and wait times
+@app.get("/scheduler")
+async def scheduler_stats():
+    return app.state.scheduler.stats()
+
+# batch jobs
+@app.get("/jobs")
+async def list_jobs(repo: Optional[str] = None):
+    return {"jobs": [job.snapshot(include_results=False) for job in _jobs.list(repo)]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if wants_ndjson(request):
+        # the summary first, then one line per finished issue (they carry whole structured_output blobs)
+        results = [job.results[n] for n in job.targets if n in job.results]
+        return ndjson_response(itertools.chain([job.snapshot(include_results=False)], results))
+    return job.snapshot()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress. Replays what already happened,
+    then pushes events live until the job finishes. Reconnecting clients send
+    Last-Event-ID to pick up where they left off.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+
+    try:
+        after = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+
+    async def stream():
+        async for event in job.follow(after):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
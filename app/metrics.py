@@ -0,0 +1,150 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Prometheus text format, just the bits we use (counters, gauges, histograms with labels).
+# Everything runs on the event loop thread, so no locking.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SESSION_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_num(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """A gauge read from a callback at scrape time (e.g. the scheduler's queue length)."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        super().__init__(name, help)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        try:
+            return [f"{self.name} {_num(self.read())}"]
+        except Exception:  # whatever it reads isn't there (yet)
+            return []
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf bucket last), sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block took. Labels can still be changed inside it."""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._counts.items()):
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {running}")
+            running += counts[-1]
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._labels(key, inf)} {running}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_num(self._sums[key])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {running}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# the metrics themselves, instrumented where the work happens
+GITHUB_FETCH_SECONDS = Histogram(
+    "github_fetch_issues_seconds", "GitHub issue listing fetches (all pages)", ["result"])
+ISSUE_CACHE_REQUESTS = Counter(
+    "issue_cache_requests_total", "Issue listing lookups by outcome (hit, miss, not_modified, delta, coalesced)", ["result"])
+DEVIN_CREATE_SECONDS = Histogram(
+    "devin_session_create_seconds", "Devin session creation latency")
+DEVIN_SESSION_SECONDS = Histogram(
+    "devin_session_seconds", "Time from session start to action plan (scope) or PR (implement)", ["stage"], SESSION_BUCKETS)
+DEVIN_POLLS = Histogram(
+    "devin_session_polls", "Status polls per Devin session", ["stage"], COUNT_BUCKETS)
+DEVIN_TIMEOUTS = Counter(
+    "devin_session_timeouts_total", "Devin sessions that didn't finish in time", ["stage"])
+BATCH_JOBS = Counter(
+    "batch_jobs_total", "Scope-and-execute batch jobs started")
+BATCH_ISSUES = Counter(
+    "batch_issues_total", "Issues submitted in batch jobs")
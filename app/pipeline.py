@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple
+
+# stage one either finishes an item (result, None) or hands it on (None, handoff)
+ScopeStage = Callable[[Any], Awaitable[Tuple[Optional[Any], Optional[Any]]]]
+ImplementStage = Callable[[Any], Awaitable[Any]]
+
+_DONE = object()
+
+
+async def run_two_stage(
+    items: Iterable[Any],
+    scope: ScopeStage,
+    implement: ImplementStage,
+    on_result: Callable[[Any], None],
+    scope_workers: int,
+    implement_workers: int,
+):
+    """
+    Scope -> implement pipeline with a worker pool per stage.
+
+    Scopers pull items and push what they hand off onto a queue that the
+    implementers drain, so the (short) scoping of the whole batch isn't held up
+    behind (long) implementations and implementers start as soon as the first
+    plan is ready. Stages must not raise, failures are results.
+    """
+    todo: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        todo.put_nowait(item)
+    plans: asyncio.Queue = asyncio.Queue()
+
+    async def scoper():
+        while not todo.empty():
+            result, handoff = await scope(todo.get_nowait())
+            if handoff is not None:
+                await plans.put(handoff)
+            else:
+                on_result(result)
+
+    async def implementer():
+        while True:
+            handoff = await plans.get()
+            if handoff is _DONE:
+                return
+            on_result(await implement(handoff))
+
+    implementers = [asyncio.create_task(implementer()) for _ in range(max(1, implement_workers))]
+    scopers = [asyncio.create_task(scoper()) for _ in range(max(1, scope_workers))]
+    try:
+        await asyncio.gather(*scopers)
+        for _ in implementers:
+            plans.put_nowait(_DONE)
+        await asyncio.gather(*implementers)
+    finally:
+        # if a stage raised anyway (or the job was cancelled) nothing is left running
+        for task in scopers + implementers:
+            task.cancel()
@@ -0,0 +1,182 @@
+import os, re
+from string import Template
+from typing import Dict, Any, List, Optional, Sequence
+
+from .issue_index import Issue
+
+# how much issue context (body, labels, comments) goes into a prompt. Roughly 4 chars a token
+PROMPT_CONTEXT_MAX_CHARS = int(os.getenv("PROMPT_CONTEXT_MAX_CHARS", "6000"))
+PROMPT_COMMENT_MAX_CHARS = int(os.getenv("PROMPT_COMMENT_MAX_CHARS", "800"))
+PROMPT_MAX_COMMENTS = int(os.getenv("PROMPT_MAX_COMMENTS", "10"))
+# scope.txt / implement.txt in here replace the built-in templates (same $placeholders)
+PROMPT_TEMPLATE_DIR = os.getenv("PROMPT_TEMPLATE_DIR")
+
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)  # issue template boilerplate
+_BLANK_LINES = re.compile(r"\n{3,}")
+_TRUNCATED = " …[truncated]"
+
+
+class PromptTemplate:
+    """
+    A prompt with $placeholders, parsed once when the module loads. render() refuses
+    missing or unexpected values instead of sending Devin a half-filled prompt.
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.template = Template(text.strip() + "\n")
+        if not self.template.is_valid():
+            raise ValueError(f"prompt template '{name}' has a malformed placeholder")
+        self.fields = frozenset(self.template.get_identifiers())
+
+    def render(self, **values: Any) -> str:
+        missing, extra = self.fields - values.keys(), values.keys() - self.fields
+        if missing or extra:
+            raise ValueError(f"prompt template '{self.name}': missing {sorted(missing)}, unexpected {sorted(extra)}")
+        return self.template.substitute(values)
+
+
+# the scoper answers in JSON, so no str.format here: braces are literal, only $names are filled in
+SCOPE_PROMPT = """
+Hey devin. Your task is to scope the GitHub issue #$issue_number titled "$issue_title" in the repository $repo_url.
+
+$context
+
+Return ONLY valid JSON in this exact shape:
+{
+  "issue_number": "$issue_number",
+  "issue_title": "$issue_title",
+  "summary": "<one-sentence scope of the issue>",
+  "confidence_score": "Low | Medium | High",
+  "action_plan": [
+    "<step 1>",
+    "<step 2>",
+    "<step 3>"
+  ]
+}
+"""
+
+IMPLEMENT_PROMPT = """
+Hey Devin. Your task is to take a given action plan and complete the ticket for the specified repository.
+Repo: $repo_url
+Issue #$issue_number titled: "$issue_title"
+
+$context
+
+Action plan:
+$plan_lines
+
+Additionally, please:
+
+1) Create and checkout branch: "devin/issue-$issue_number-[short_title]" (The short_title should be derived from the issue title.)
+2) Implement changes with clear commits mentioning "$issue_number-[short_title]"
+3) Push the branch
+4) Open a Pull Request referencing the issue number #$issue_number in the title/body
+"""
+
+
+def _load(name: str, default: str) -> PromptTemplate:
+    if PROMPT_TEMPLATE_DIR:
+        path = os.path.join(PROMPT_TEMPLATE_DIR, f"{name}.txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return PromptTemplate(name, f.read())
+    return PromptTemplate(name, default)
+
+
+SCOPE = _load("scope", SCOPE_PROMPT)
+IMPLEMENT = _load("implement", IMPLEMENT_PROMPT)
+
+
+def _clean(text: Optional[str]) -> str:
+    text = _HTML_COMMENT.sub("", text or "").replace("\r\n", "\n")
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - len(_TRUNCATED))].rstrip() + _TRUNCATED
+
+
+def relevant_comments(comments: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Newest first, without bots and empty ones, at most PROMPT_MAX_COMMENTS."""
+    picked = [
+        c for c in comments
+        if _clean(c.get("body")) and (c.get("user") or {}).get("type") != "Bot"
+    ]
+    return picked[::-1][:PROMPT_MAX_COMMENTS]
+
+
+def issue_context(
+    issue: Optional[Issue],
+    comments: Sequence[Dict[str, Any]] = (),
+    budget: int = PROMPT_CONTEXT_MAX_CHARS,
+) -> str:
+    """
+    Labels, body and the most recent comments of an issue, in at most `budget` chars.
+    The body may use up to two thirds when there are comments, whatever it leaves over
+    goes to the comments (newest first, each clipped to PROMPT_COMMENT_MAX_CHARS).
+    """
+    if issue is None:
+        return "(no further details on the issue)"
+
+    parts = []
+    if issue.labels:
+        parts.append("Labels: " + ", ".join(issue.labels))
+    body = _clean(issue.body)
+    comments = relevant_comments(comments)
+
+    room = budget - sum(len(p) + 1 for p in parts)
+    body_room = room * 2 // 3 if comments else room
+    if body:
+        parts.append("Description:\n" + _clip(body, body_room - len("Description:\n")))
+    else:
+        parts.append("Description: (empty)")
+    room -= len(parts[-1]) + 1
+
+    lines = []
+    room -= len("Recent comments:\n")
+    for c in comments:
+        prefix = f"- @{(c.get('user') or {}).get('login') or 'someone'}: "
+        limit = min(PROMPT_COMMENT_MAX_CHARS, room - len(prefix) - 1)
+        if limit < 80:  # not worth a stub
+            break
+        line = prefix + _clip(" ".join(_clean(c["body"]).split()), limit)
+        lines.append(line)
+        room -= len(line) + 1
+    if lines:
+        parts.append("Recent comments:\n" + "\n".join(lines))
+    return "\n".join(parts)
+
+
+def scope_prompt(
+    repo_url: str,
+    issue_number: int,
+    issue_title: str,
+    issue: Optional[Issue] = None,
+    comments: Sequence[Dict[str, Any]] = (),
+) -> str:
+    return SCOPE.render(
+        repo_url=repo_url,
+        issue_number=issue_number,
+        issue_title=issue_title,
+        context=issue_context(issue, comments),
+    )
+
+
+def implement_prompt(
+    repo_url: str,
+    issue_number: int,
+    issue_title: str,
+    action_plan: Sequence[str],
+    issue: Optional[Issue] = None,
+) -> str:
+    # the plan already distills the discussion, the implementer gets labels and body only
+    return IMPLEMENT.render(
+        repo_url=repo_url,
+        issue_number=issue_number,
+        issue_title=issue_title,
+        context=issue_context(issue),
+        plan_lines="\n".join(f"- {s}" for s in action_plan),
+    )
@@ -0,0 +1,145 @@
+import os, time, random, asyncio, aiohttp
+from contextlib import asynccontextmanager
+from typing import Optional
+
+RETRY_MAX = int(os.getenv("HTTP_RETRY_MAX", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("HTTP_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("HTTP_RETRY_MAX_SECONDS", "30"))
+# start spacing requests out once less than this fraction of the budget is left
+RATE_LIMIT_SLOWDOWN_FRACTION = float(os.getenv("RATE_LIMIT_SLOWDOWN_FRACTION", "0.1"))
+# never sit on a single request longer than this waiting for the budget to reset
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class RateLimiter:
+    """
+    Request budget for one API (GitHub, Devin), shared by every request to it.
+
+    Reads X-RateLimit-Remaining / -Limit / -Reset and Retry-After off each response.
+    While plenty of budget is left requests go straight through; below
+    slowdown_fraction they're spaced evenly over what's left of the window, and a
+    429 / exhausted budget holds everyone until the reset. Idempotent requests
+    are retried on 429 / 5xx / connection errors with exponential backoff and full
+    jitter, other methods only on 429 (the request was rejected, not processed).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_retries: int = RETRY_MAX,
+        base_delay: float = RETRY_BASE_SECONDS,
+        max_delay: float = RETRY_MAX_SECONDS,
+        slowdown_fraction: float = RATE_LIMIT_SLOWDOWN_FRACTION,
+        max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slowdown_fraction = slowdown_fraction
+        self.max_wait = max_wait
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None  # epoch seconds
+        self._blocked_until = 0.0  # monotonic
+        self._next_slot = 0.0  # monotonic, when paced
+        self.retries = 0
+        self.throttled = 0
+
+    def _pace_interval(self) -> float:
+        """Gap between requests so the remaining budget lasts until the reset (0 = no pacing)."""
+        if self.remaining is None or self.limit is None or self.reset_at is None:
+            return 0.0
+        if self.remaining > self.limit * self.slowdown_fraction:
+            return 0.0
+        window = self.reset_at - time.time()
+        if window <= 0:
+            return 0.0
+        return window / max(self.remaining, 1)
+
+    async def _wait_turn(self):
+        now = time.monotonic()
+        wait = self._blocked_until - now
+        interval = self._pace_interval()
+        if interval > 0:
+            # reserve a slot so concurrent callers line up instead of firing together
+            self._next_slot = max(self._next_slot, now) + interval
+            wait = max(wait, self._next_slot - interval - now)
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            raise RuntimeError(f"{self.name} rate limit exhausted, resets in {wait:.0f}s")
+        self.throttled += 1
+        await asyncio.sleep(wait)
+
+    def observe(self, resp: aiohttp.ClientResponse) -> Optional[float]:
+        """Update the budget from a response. Returns how long to back off if we got throttled."""
+        h = resp.headers
+        try:
+            if "X-RateLimit-Limit" in h:
+                self.limit = int(h["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in h:
+                self.remaining = int(h["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in h:
+                self.reset_at = float(h["X-RateLimit-Reset"])
+        except ValueError:
+            pass
+
+        retry_after = _retry_after(h.get("Retry-After"))
+        exhausted = resp.status in (403, 429) and self.remaining == 0
+        if retry_after is None and exhausted and self.reset_at is not None:
+            retry_after = max(0.0, self.reset_at - time.time())
+        if retry_after is not None and resp.status in (403, 429):
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            return retry_after
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @asynccontextmanager
+    async def request(self, session: aiohttp.ClientSession, method: str, url: str, **kwargs):
+        """session.request(...) behind the budget, with retries. Yields the final response."""
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            await self._wait_turn()
+            try:
+                resp = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"[{self.name}] {method} {url} failed ({e!r}), retry {attempt + 1} in {delay:.1f}s")
+            else:
+                throttled_for = self.observe(resp)
+                retryable = resp.status == 429 or throttled_for is not None or (idempotent and resp.status in RETRY_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    try:
+                        yield resp
+                    finally:
+                        resp.release()
+                    return
+                resp.release()
+                delay = max(throttled_for or 0.0, self._backoff(attempt))
+                print(f"[{self.name}] {method} {url} -> {resp.status}, retry {attempt + 1} in {delay:.1f}s")
+
+            self.retries += 1
+            attempt += 1
+            if delay > self.max_wait:
+                raise RuntimeError(f"{self.name} rate limit exhausted, resets in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    # only the delta-seconds form, neither API sends HTTP dates
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,132 @@
+import os, time, asyncio, itertools
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Tuple, Iterable
+
+# total Devin sessions running at once, across every batch and caller
+DEVIN_MAX_SESSIONS = int(os.getenv("DEVIN_MAX_SESSIONS", "10"))
+
+
+def _parse_label_priorities(raw: str) -> Dict[str, int]:
+    out = {}
+    for pair in raw.split(","):
+        if "=" in pair:
+            name, value = pair.split("=", 1)
+            out[name.strip().lower()] = int(value)
+    return out
+
+# issue label -> priority boost, e.g. "critical=3,bug=1"
+LABEL_PRIORITIES = _parse_label_priorities(
+    os.getenv("DEVIN_LABEL_PRIORITIES", "critical=3,urgent=3,p0=3,high=2,p1=2,bug=1")
+)
+
+
+def label_priority(labels: Iterable[Any]) -> int:
+    """Highest boost among an issue's labels (GitHub label objects or plain names)."""
+    names = [(l.get("name") if isinstance(l, dict) else l) or "" for l in labels or []]
+    return max((LABEL_PRIORITIES.get(n.lower(), 0) for n in names), default=0)
+
+
+Tenant = Tuple[str, str]  # (repo, caller)
+
+
+@dataclass
+class _Waiter:
+    seq: int
+    tenant: Tenant
+    priority: int
+    enqueued: float
+    future: asyncio.Future
+
+
+class SessionScheduler:
+    """
+    Server-wide gate in front of Devin session creation.
+
+    At most max_sessions sessions run at once (a slot is held from creation until
+    the session is done). When a slot frees up the next waiter is picked by
+    highest priority, then by the (repo, caller) with the fewest running sessions,
+    then by whoever was served longest ago, then by arrival, so one big
+    `resolve all` can't starve everyone else.
+    """
+
+    def __init__(self, max_sessions: int = DEVIN_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._active = 0
+        self._active_by_tenant: Counter = Counter()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._grants = itertools.count()
+        self._last_served: Dict[Tenant, int] = {}
+        self._waits: deque = deque(maxlen=500)  # recent queue wait times
+
+    @asynccontextmanager
+    async def slot(self, repo: str, caller: str = "anonymous", priority: int = 0):
+        tenant = (repo, caller or "anonymous")
+        await self._acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    async def _acquire(self, tenant: Tenant, priority: int):
+        enqueued = time.monotonic()
+        if self._active < self.max_sessions and not self._waiting:
+            self._grant(tenant, enqueued)
+            return
+
+        waiter = _Waiter(next(self._seq), tenant, priority, enqueued, asyncio.get_running_loop().create_future())
+        self._waiting.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release(tenant)  # granted, but we're not going to use it
+            raise
+
+    def _grant(self, tenant: Tenant, enqueued: float):
+        self._last_served[tenant] = next(self._grants)
+        self._active += 1
+        self._active_by_tenant[tenant] += 1
+        self._waits.append(time.monotonic() - enqueued)
+
+    def _release(self, tenant: Tenant):
+        self._active -= 1
+        self._active_by_tenant[tenant] -= 1
+        if self._active_by_tenant[tenant] <= 0:
+            del self._active_by_tenant[tenant]
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_sessions and self._waiting:
+            best = min(
+                self._waiting,
+                key=lambda w: (
+                    -w.priority,
+                    self._active_by_tenant[w.tenant],
+                    self._last_served.get(w.tenant, -1),  # round robin between equals
+                    w.seq,
+                ),
+            )
+            self._waiting.remove(best)
+            if best.future.done():  # cancelled while queued
+                continue
+            self._grant(best.tenant, best.enqueued)
+            best.future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        waits = list(self._waits)
+        return {
+            "max_sessions": self.max_sessions,
+            "active": self._active,
+            "queued": len(self._waiting),
+            "active_by_repo": dict(Counter(t[0] for t in self._active_by_tenant.elements())),
+            "queued_by_repo": dict(Counter(w.tenant[0] for w in self._waiting)),
+            "oldest_wait_seconds": round(max((now - w.enqueued for w in self._waiting), default=0.0), 3),
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "max_wait_seconds": round(max(waits), 3) if waits else 0.0,
+        }
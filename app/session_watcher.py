@@ -0,0 +1,173 @@
+import os, time, asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Awaitable, Optional, List
+
+WATCH_MIN_INTERVAL = float(os.getenv("DEVIN_WATCH_MIN_INTERVAL", "2"))
+WATCH_MAX_INTERVAL = float(os.getenv("DEVIN_WATCH_MAX_INTERVAL", "30"))
+WATCH_BACKOFF = float(os.getenv("DEVIN_WATCH_BACKOFF", "1.5"))
+
+
+@dataclass
+class _Waiter:
+    is_done: Callable[[Dict[str, Any]], bool]
+    future: asyncio.Future
+    deadline: float
+
+
+@dataclass
+class _Watched:
+    session_id: str
+    waiters: List[_Waiter]
+    interval: float
+    next_check: float
+    started: float = field(default_factory=time.monotonic)
+    last_status: Optional[str] = None
+    polls: int = 0
+    checking: Optional[asyncio.Task] = None  # the check in flight, if any
+
+
+class SessionWatcher:
+    """
+    One loop that watches every active Devin session, instead of a poll loop per issue.
+
+    Each tick it starts a check (its own task) for every due session that isn't
+    already being checked, and resolves futures as soon as is_done(body) says so.
+    A hanging or failing check only holds up its own session, and waiters on it
+    still time out at their deadline. A session is rechecked quickly while
+    its status is moving and backs off (up to max_interval) while it sits still.
+    The loop only runs while something is being watched. Several waiters on the same
+    session share its polls, each with its own is_done and deadline.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+        backoff: float = WATCH_BACKOFF,
+    ):
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._watched: Dict[str, _Watched] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> int:
+        return len(self._watched)
+
+    async def wait(self, session_id: str, is_done: Callable[[Dict[str, Any]], bool], max_wait_seconds: float) -> Dict[str, Any]:
+        """Wait until is_done(body) for the session, TimeoutError after max_wait_seconds."""
+        now = time.monotonic()
+        waiter = _Waiter(
+            is_done=is_done,
+            future=asyncio.get_running_loop().create_future(),
+            deadline=now + max_wait_seconds,
+        )
+        watched = self._watched.get(session_id)
+        if watched is None:
+            watched = _Watched(
+                session_id=session_id,
+                waiters=[],
+                interval=self.min_interval,
+                next_check=now + self.min_interval,
+            )
+            self._watched[session_id] = watched
+        else:
+            # already polled for someone else, just make sure our deadline gets checked
+            watched.next_check = min(watched.next_check, waiter.deadline)
+        watched.waiters.append(waiter)
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await waiter.future
+        finally:
+            self._drop(watched, waiter)
+
+    async def _run(self):
+        while self._watched:
+            self._wakeup.clear()
+            now = time.monotonic()
+            wake_at = None
+            for w in list(self._watched.values()):
+                if w.checking is None and w.next_check <= now:
+                    w.checking = asyncio.create_task(self._guarded_check(w))
+                if w.checking is None:
+                    wake_at = w.next_check if wake_at is None else min(wake_at, w.next_check)
+                    continue
+                # the check may hang (retries, slow Devin), deadlines still count meanwhile
+                for waiter in list(w.waiters):
+                    if now >= waiter.deadline:
+                        self._finish(w, waiter, error=TimeoutError("Devin did not finish in time."))
+                    else:
+                        wake_at = waiter.deadline if wake_at is None else min(wake_at, waiter.deadline)
+
+            if wake_at is None:  # everything left is being checked, a finished check wakes us
+                await self._wakeup.wait()
+                continue
+            try:
+                # a new session may be due sooner than everything we're sleeping on
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, wake_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _guarded_check(self, w: _Watched):
+        try:
+            await self._check(w)
+        except Exception as e:  # e.g. is_done choking on an odd body, fail this session's waiters only
+            for waiter in list(w.waiters):
+                self._finish(w, waiter, error=e)
+        finally:
+            w.checking = None
+            self._wakeup.set()
+
+    async def _check(self, w: _Watched):
+        w.polls += 1
+        try:
+            body = await self.fetch(w.session_id)
+        except Exception as e:
+            for waiter in list(w.waiters):
+                self._finish(w, waiter, error=e)
+            return
+
+        status = (body.get("status_enum") or body.get("status") or "").lower()
+        now = time.monotonic()
+        print(f"[poll] session={w.session_id} status={status} waited={now - w.started:.0f}s polls={w.polls}")
+
+        for waiter in list(w.waiters):
+            if waiter.is_done(body):
+                self._finish(w, waiter, result=body)
+            elif now >= waiter.deadline:
+                self._finish(w, waiter, error=TimeoutError("Devin did not finish in time."))
+        if not w.waiters:
+            return
+
+        # status moved: look again soon, otherwise back off
+        if status != w.last_status:
+            w.interval = self.min_interval
+        else:
+            w.interval = min(w.interval * self.backoff, self.max_interval)
+        w.last_status = status
+        w.next_check = min(time.monotonic() + w.interval, min(waiter.deadline for waiter in w.waiters))
+
+    def _drop(self, w: _Watched, waiter: _Waiter):
+        if waiter in w.waiters:
+            w.waiters.remove(waiter)
+        if not w.waiters and self._watched.get(w.session_id) is w:
+            del self._watched[w.session_id]
+            # nobody left to tell, don't leave a hanging poll behind
+            if w.checking is not None and w.checking is not asyncio.current_task():
+                w.checking.cancel()
+
+    def _finish(self, w: _Watched, waiter: _Waiter, result: Optional[Dict[str, Any]] = None,
+                error: Optional[BaseException] = None):
+        self._drop(w, waiter)
+        if waiter.future.done():  # the waiter went away (cancelled)
+            return
+        if error is not None:
+            waiter.future.set_exception(error)
+        else:
+            waiter.future.set_result(result)
@@ -0,0 +1,199 @@
+import os, json, time, hashlib, sqlite3, threading
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "devin_results.sqlite3")
+# how long a scoper answer stays reusable for unchanged issue content (<= 0 disables reuse)
+SCOPE_CACHE_TTL_SECONDS = float(os.getenv("SCOPE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issue_results (
+    repo                  TEXT    NOT NULL,
+    issue_number          INTEGER NOT NULL,
+    status                TEXT    NOT NULL,  -- scoping | scoped | implementing | success | failed
+    scoped                TEXT,              -- scoper structured_output (json)
+    executed              TEXT,              -- implementer structured_output (json)
+    scope_session_id      TEXT,
+    implement_session_id  TEXT,
+    error                 TEXT,
+    created_at            REAL    NOT NULL,
+    updated_at            REAL    NOT NULL,
+    PRIMARY KEY (repo, issue_number)
+);
+CREATE TABLE IF NOT EXISTS scope_cache (
+    repo          TEXT    NOT NULL,
+    issue_number  INTEGER NOT NULL,
+    content_hash  TEXT    NOT NULL,  -- issue_content_hash(issue)
+    scoped        TEXT    NOT NULL,
+    created_at    REAL    NOT NULL,
+    PRIMARY KEY (repo, issue_number, content_hash)
+);
+"""
+
+
+def issue_content_hash(issue: Dict[str, Any]) -> str:
+    """Hash of what the scoper reads: title, body and updated_at."""
+    key = json.dumps([issue.get("title"), issue.get("body"), issue.get("updated_at")])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IssueRecord:
+    repo: str
+    issue_number: int
+    status: str
+    scoped: Optional[Dict[str, Any]]
+    executed: Optional[Dict[str, Any]]
+    scope_session_id: Optional[str]
+    implement_session_id: Optional[str]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @property
+    def has_pr(self) -> bool:
+        return self.status == "success" and bool(self.executed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "issue_number": self.issue_number,
+            "status": self.status,
+            "scoped": self.scoped,
+            "executed": self.executed,
+            "scope_session_id": self.scope_session_id,
+            "implement_session_id": self.implement_session_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class ResultStore:
+    """
+    SQLite record of every issue we've scoped / implemented, keyed by (repo, issue_number).
+
+    Writes happen as each stage finishes (and as soon as a Devin session is created),
+    so a restart mid-batch only loses the stage that was in flight. The writes are
+    single-row and tiny, so they're done inline rather than on a thread pool.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # opened lazily so importing the app doesn't create a database file
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _upsert(self, repo: str, issue_number: int, **cols):
+        now = time.time()
+        cols["updated_at"] = now
+        names = ", ".join(cols)
+        placeholders = ", ".join("?" for _ in cols)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols)
+        with self._lock, self._db() as db:
+            db.execute(
+                f"INSERT INTO issue_results (repo, issue_number, created_at, {names}) "
+                f"VALUES (?, ?, ?, {placeholders}) "
+                f"ON CONFLICT (repo, issue_number) DO UPDATE SET {updates}",
+                (repo, issue_number, now, *cols.values()),
+            )
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> IssueRecord:
+        return IssueRecord(
+            repo=row["repo"],
+            issue_number=row["issue_number"],
+            status=row["status"],
+            scoped=json.loads(row["scoped"]) if row["scoped"] else None,
+            executed=json.loads(row["executed"]) if row["executed"] else None,
+            scope_session_id=row["scope_session_id"],
+            implement_session_id=row["implement_session_id"],
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def get(self, repo: str, issue_number: int) -> Optional[IssueRecord]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT * FROM issue_results WHERE repo = ? AND issue_number = ?", (repo, issue_number)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def list(self, repo: str) -> List[IssueRecord]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT * FROM issue_results WHERE repo = ? ORDER BY issue_number", (repo,)
+            ).fetchall()
+        return [self._record(r) for r in rows]
+
+    # stage transitions
+    def session_started(self, repo: str, issue_number: int, stage: str, session_id: str):
+        if stage == "scope":
+            self._upsert(repo, issue_number, status="scoping", scope_session_id=session_id, error=None)
+        else:
+            self._upsert(repo, issue_number, status="implementing", implement_session_id=session_id, error=None)
+
+    def save_scope(self, repo: str, issue_number: int, scoped: Dict[str, Any], content_hash: Optional[str] = None):
+        self._upsert(repo, issue_number, status="scoped", scoped=json.dumps(scoped))
+        if content_hash:
+            with self._lock, self._db() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO scope_cache (repo, issue_number, content_hash, scoped, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (repo, issue_number, content_hash, json.dumps(scoped), time.time()),
+                )
+
+    def cached_scope(
+        self,
+        repo: str,
+        issue_number: int,
+        content_hash: str,
+        ttl_seconds: float = SCOPE_CACHE_TTL_SECONDS,
+    ) -> Optional[Dict[str, Any]]:
+        """Scoper output for this exact issue content, if we have one younger than ttl_seconds."""
+        if ttl_seconds <= 0:
+            return None
+        with self._lock:
+            row = self._db().execute(
+                "SELECT scoped FROM scope_cache "
+                "WHERE repo = ? AND issue_number = ? AND content_hash = ? AND created_at >= ?",
+                (repo, issue_number, content_hash, time.time() - ttl_seconds),
+            ).fetchone()
+        return json.loads(row["scoped"]) if row else None
+
+    def prune_scope_cache(self, ttl_seconds: float = SCOPE_CACHE_TTL_SECONDS):
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM scope_cache WHERE created_at < ?", (time.time() - ttl_seconds,))
+
+    def save_execution(self, repo: str, issue_number: int, executed: Dict[str, Any]):
+        self._upsert(repo, issue_number, status="success", executed=json.dumps(executed))
+
+    def save_failure(self, repo: str, issue_number: int, error: str):
+        # forget in-flight sessions so the next run starts fresh ones instead of reattaching
+        with self._lock, self._db() as db:
+            db.execute(
+                "UPDATE issue_results SET status = 'failed', error = ?, updated_at = ?, "
+                "scope_session_id = CASE WHEN status = 'scoping' THEN NULL ELSE scope_session_id END, "
+                "implement_session_id = CASE WHEN status = 'implementing' THEN NULL ELSE implement_session_id END "
+                "WHERE repo = ? AND issue_number = ?",
+                (error, time.time(), repo, issue_number),
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO issue_results (repo, issue_number, status, error, created_at, updated_at) "
+                "VALUES (?, ?, 'failed', ?, ?, ?)",
+                (repo, issue_number, error, time.time(), time.time()),
+            )
+
+    def clear(self):
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM issue_results")
+            db.execute("DELETE FROM scope_cache")
@@ -0,0 +1,36 @@
+import os, json, asyncio
+from typing import Any, Dict, Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+NDJSON = "application/x-ndjson"
+# lines are sent in chunks of about this size: big enough to compress well, small enough
+# that memory stays flat however many rows there are
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", "65536"))
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Accept: application/x-ndjson, or ?format=ndjson for clients that can't set headers."""
+    return NDJSON in request.headers.get("accept", "") or request.query_params.get("format") == "ndjson"
+
+
+def ndjson_response(rows: Iterable[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """
+    One JSON object per line, serialized as the rows are pulled, so pass a generator
+    and nothing is built up front.
+    """
+    async def body():
+        chunk, size = [], 0
+        for row in rows:
+            line = json.dumps(row, separators=(",", ":")) + "\n"
+            chunk.append(line)
+            size += len(line)
+            if size >= STREAM_CHUNK_BYTES:
+                yield "".join(chunk)
+                chunk, size = [], 0
+                await asyncio.sleep(0)  # a huge export shouldn't hog the event loop
+        if chunk:
+            yield "".join(chunk)
+
+    return StreamingResponse(body(), media_type=NDJSON, headers=headers)
@@ -0,0 +1,30 @@
+import os, hmac, hashlib
+from typing import Dict, Any, Optional
+
+from .issue_cache import IssueCache
+
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# queue a scope-only job for every newly opened issue, so its plan is ready (and cached) early
+WEBHOOK_AUTO_SCOPE = os.getenv("WEBHOOK_AUTO_SCOPE", "0").lower() in {"1", "true", "yes"}
+
+# `issues` actions that take an issue out of our (open issues) listing
+REMOVE_ACTIONS = {"closed", "deleted", "transferred"}
+
+
+def verify_signature(secret: Optional[str], body: bytes, signature: Optional[str]) -> bool:
+    """Check X-Hub-Signature-256 (hex HMAC-SHA256 of the raw body) against our secret."""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def apply_issue_event(cache: IssueCache, repo: str, action: str, issue: Dict[str, Any]) -> bool:
+    """
+    Apply an `issues` webhook to the cached listing of repo. Opened, edited,
+    labeled, reopened, ... replace the issue with the payload's copy, closed /
+    deleted / transferred drop it. Returns False when the repo isn't cached.
+    """
+    if action in REMOVE_ACTIONS or issue.get("state") == "closed":
+        return cache.remove_issue(repo, issue["number"])
+    return cache.upsert_issue(repo, issue)
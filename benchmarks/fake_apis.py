@@ -0,0 +1,246 @@
+"""
+Local stand-ins for the GitHub issues API and the Devin sessions API.
+
+Both are plain aiohttp apps with knobs for latency, failures and rate limits, so the
+backend can be exercised end to end without a network (or API keys).
+"""
+import re, time, random, asyncio, hashlib, itertools
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from aiohttp import web
+
+WORDS = (
+    "crash login timeout cache page render token upload export search memory leak "
+    "button layout mobile api error retry config docs typo slow query index sort"
+).split()
+LABELS = ["bug", "enhancement", "docs", "critical", "p1", "good first issue"]
+
+
+def _latency(spec: Tuple[float, float]) -> float:
+    lo, hi = spec
+    return random.uniform(lo, hi) if hi > lo else lo
+
+
+@dataclass
+class RateLimit:
+    """X-RateLimit-* bookkeeping: `limit` requests per `window` seconds (0 = unlimited)."""
+    limit: int = 0
+    window: float = 3600.0
+    used: int = 0
+    reset_at: float = field(default_factory=lambda: time.time() + 3600.0)
+
+    def take(self) -> Tuple[bool, Dict[str, str]]:
+        if not self.limit:
+            return True, {}
+        now = time.time()
+        if now >= self.reset_at:
+            self.used, self.reset_at = 0, now + self.window
+        ok = self.used < self.limit
+        if ok:
+            self.used += 1
+        return ok, {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - self.used),
+            "X-RateLimit-Reset": str(int(self.reset_at)),
+        }
+
+
+class FakeGitHub:
+    """
+    GET /repos/{owner}/{repo}/issues with page / per_page / since / state, Link
+    rel="last", ETags (If-None-Match -> 304, which doesn't use up the rate limit),
+    X-RateLimit-* headers and random 502s, plus .../issues/{number}/comments.
+    Repos are created with add_repo().
+    """
+
+    def __init__(
+        self,
+        latency: Tuple[float, float] = (0.0, 0.0),
+        failure_rate: float = 0.0,
+        rate_limit: int = 0,
+        rate_window: float = 3600.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate = RateLimit(rate_limit, rate_window)
+        self.random = random.Random(seed)
+        self.repos: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests = 0
+        self.not_modified = 0
+
+    def add_repo(self, name: str, issues: int, pr_ratio: float = 0.1) -> List[Dict[str, Any]]:
+        rows = []
+        for n in range(1, issues + 1):
+            day = 1 + n % 28
+            row = {
+                "number": n,
+                "title": " ".join(self.random.sample(WORDS, 3)) + f" #{n}",
+                "body": " ".join(self.random.choices(WORDS, k=40)),
+                "state": "open",
+                "html_url": f"https://github.com/bench/{name}/issues/{n}",
+                "labels": [{"name": l} for l in self.random.sample(LABELS, self.random.randint(0, 2))],
+                "assignees": [],
+                "comments": self.random.randint(0, 20),
+                "created_at": f"2024-01-{day:02d}T00:00:00Z",
+                "updated_at": f"2024-02-{day:02d}T{n % 24:02d}:00:00Z",
+            }
+            if self.random.random() < pr_ratio:
+                row["pull_request"] = {"url": row["html_url"]}
+            rows.append(row)
+        self.repos[name] = rows
+        return rows
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/repos/{owner}/{repo}/issues", self.list_issues)
+        app.router.add_get("/repos/{owner}/{repo}/issues/{number}/comments", self.list_comments)
+        return app
+
+    async def list_comments(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(_latency(self.latency))
+        rows = self.repos.get(request.match_info["repo"]) or []
+        number = int(request.match_info["number"])
+        issue = next((r for r in rows if r["number"] == number), None)
+        if issue is None:
+            return web.json_response({"message": "Not Found"}, status=404)
+        rng = random.Random(number)  # same comments every time
+        return web.json_response([
+            {"user": {"login": f"user{i}", "type": "User"}, "body": " ".join(rng.choices(WORDS, k=20))}
+            for i in range(min(issue["comments"], 100))
+        ])
+
+    async def list_issues(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        await asyncio.sleep(_latency(self.latency))
+        rows = self.repos.get(request.match_info["repo"])
+        if rows is None:
+            return web.json_response({"message": "Not Found"}, status=404)
+
+        q = request.query
+        state = q.get("state", "open")
+        picked = [r for r in rows if state == "all" or r["state"] == state]
+        if q.get("since"):
+            picked = [r for r in picked if r["updated_at"] >= q["since"]]
+        picked.sort(key=lambda r: r["updated_at"], reverse=q.get("direction", "desc") == "desc")
+
+        per_page = min(int(q.get("per_page", 30)), 100)
+        page = int(q.get("page", 1))
+        body = picked[(page - 1) * per_page:page * per_page]
+        etag = '"' + hashlib.md5(repr([(r["number"], r["updated_at"]) for r in body]).encode()).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        ok, headers = self.rate.take()
+        if not ok:
+            return web.json_response({"message": "API rate limit exceeded"}, status=403, headers=headers)
+        if self.random.random() < self.failure_rate:
+            return web.json_response({"message": "Server Error"}, status=502, headers=headers)
+
+        last = max(1, -(-len(picked) // per_page))
+        if last > 1:
+            headers["Link"] = f'<{request.url.update_query(page=last)}>; rel="last"'
+        headers["ETag"] = etag
+        return web.json_response(body, headers=headers)
+
+
+@dataclass
+class _Session:
+    id: str
+    issue_number: int
+    stage: str  # scope | implement
+    created: float
+    done_at: float
+    polls: int = 0
+
+
+class FakeDevin:
+    """
+    POST /v1/sessions and GET /v1/sessions/{id}. A session finishes after a random
+    duration (uniform over scope_seconds / implement_seconds) and then carries an
+    action plan or a PR in structured_output. Creates fail with failure_rate and
+    every call is rate limited like GitHub.
+    """
+
+    def __init__(
+        self,
+        latency: Tuple[float, float] = (0.0, 0.0),
+        scope_seconds: Tuple[float, float] = (0.05, 0.2),
+        implement_seconds: Tuple[float, float] = (0.1, 0.5),
+        failure_rate: float = 0.0,
+        rate_limit: int = 0,
+        rate_window: float = 60.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.scope_seconds = scope_seconds
+        self.implement_seconds = implement_seconds
+        self.failure_rate = failure_rate
+        self.rate = RateLimit(rate_limit, rate_window)
+        self.random = random.Random(seed)
+        self.sessions: Dict[str, _Session] = {}
+        self._ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/sessions", self.create)
+        app.router.add_get("/v1/sessions/{session_id}", self.get)
+        return app
+
+    async def _gate(self) -> Tuple[Optional[web.Response], Dict[str, str]]:
+        await asyncio.sleep(_latency(self.latency))
+        ok, headers = self.rate.take()
+        if not ok:
+            headers["Retry-After"] = "1"
+            return web.json_response({"detail": "rate limited"}, status=429, headers=headers), headers
+        return None, headers
+
+    async def create(self, request: web.Request) -> web.Response:
+        denied, headers = await self._gate()
+        if denied:
+            return denied
+        if self.random.random() < self.failure_rate:
+            return web.json_response({"detail": "internal error"}, status=500, headers=headers)
+
+        prompt = (await request.json()).get("prompt", "")
+        match = re.search(r"#(\d+)", prompt)
+        stage = "implement" if "Action plan:" in prompt else "scope"
+        duration = _latency(self.implement_seconds if stage == "implement" else self.scope_seconds)
+        now = time.monotonic()
+        session = _Session(f"devin-{next(self._ids)}", int(match.group(1)) if match else 0, stage, now, now + duration)
+        self.sessions[session.id] = session
+        return web.json_response({"session_id": session.id}, headers=headers)
+
+    async def get(self, request: web.Request) -> web.Response:
+        denied, headers = await self._gate()
+        if denied:
+            return denied
+        session = self.sessions.get(request.match_info["session_id"])
+        if session is None:
+            return web.json_response({"detail": "not found"}, status=404, headers=headers)
+
+        session.polls += 1
+        if time.monotonic() < session.done_at:
+            return web.json_response({"session_id": session.id, "status_enum": "running"}, headers=headers)
+        if session.stage == "scope":
+            output = {"issue_number": str(session.issue_number), "summary": "bench", "confidence_score": "High",
+                      "action_plan": ["reproduce", "fix", "add a test"]}
+        else:
+            output = {"pull_request_url": f"https://github.com/bench/pr/{session.issue_number}",
+                      "branch_name": f"devin/issue-{session.issue_number}"}
+        return web.json_response(
+            {"session_id": session.id, "status_enum": "finished", "structured_output": output}, headers=headers)
+
+    def issue_latencies(self) -> List[float]:
+        """Per issue: first scope session created -> implement session done (seconds)."""
+        first: Dict[int, float] = {}
+        done: Dict[int, float] = {}
+        for s in self.sessions.values():
+            if s.stage == "scope":
+                first[s.issue_number] = min(first.get(s.issue_number, s.created), s.created)
+            else:
+                done[s.issue_number] = max(done.get(s.issue_number, s.done_at), s.done_at)
+        return [done[n] - first[n] for n in done if n in first]
@@ -0,0 +1,182 @@
+"""
+End-to-end benchmark of the backend against the local fakes in fake_apis.py.
+
+    python -m benchmarks.run --sizes 10 100 1000
+
+For each size a repo with that many issues is served by FakeGitHub, then we time
+the issue endpoints (cold, warm, filtered, single issue) and a full
+scope-and-execute batch against FakeDevin, all in-process over ASGI.
+"""
+import os, sys, time, json, asyncio, argparse, contextlib, statistics
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiohttp.test_utils import TestServer
+
+from benchmarks.fake_apis import FakeGitHub, FakeDevin
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(values),
+        "p50_ms": round(_pct(values, 50) * 1000, 2),
+        "p95_ms": round(_pct(values, 95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+    }
+
+
+async def _timed(client, method: str, url: str, **kw):
+    start = time.perf_counter()
+    resp = await client.request(method, url, **kw)
+    elapsed = time.perf_counter() - start
+    if resp.status_code >= 400:
+        raise RuntimeError(f"{method} {url} -> {resp.status_code}: {resp.text[:200]}")
+    return resp, elapsed
+
+
+async def bench_size(client, main, devin: FakeDevin, repo: str, size: int, repeat: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"issues": size}
+
+    main._repo_issues_cache.clear()
+    _, cold = await _timed(client, "GET", f"/{repo}/issues")
+    out["list_cold_ms"] = round(cold * 1000, 2)
+
+    warm = [(await _timed(client, "GET", f"/{repo}/issues"))[1] for _ in range(repeat)]
+    out["list_warm"] = _summary(warm)
+
+    search = [(await _timed(client, "GET", f"/{repo}/issues", params={"q": "crash", "labels": "bug", "per_page": 20}))[1]
+              for _ in range(repeat)]
+    out["list_filtered"] = _summary(search)
+
+    numbers = sorted(main._repo_issues_cache[repo])
+    single = [(await _timed(client, "GET", f"/{repo}/issues/{numbers[i % len(numbers)]}"))[1] for i in range(repeat)]
+    out["get_issue"] = _summary(single)
+
+    devin.sessions.clear()
+    main._results.clear()
+    start = time.perf_counter()
+    resp, _ = await _timed(client, "POST", f"/{repo}/issues/scope-and-execute-batch", json={"all": True})
+    job_id = resp.json()["job_id"]
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in {"finished", "failed"}:
+            break
+        await asyncio.sleep(0.02)
+    wall = time.perf_counter() - start
+    out["batch"] = {
+        "selected": job["total_selected"],
+        "succeeded": job["succeeded"],
+        "failed": job["failed"],
+        "wall_s": round(wall, 3),
+        "issues_per_s": round(job["total_selected"] / wall, 2) if wall else 0.0,
+        "issue_latency": _summary(devin.issue_latencies()),
+        "polls_per_session": round(statistics.fmean(s.polls for s in devin.sessions.values()), 2) if devin.sessions else 0,
+    }
+    return out
+
+
+async def main(args) -> List[Dict[str, Any]]:
+    github = FakeGitHub(
+        latency=(args.github_latency, args.github_latency * 2),
+        failure_rate=args.github_failure_rate,
+        rate_limit=args.github_rate_limit,
+        seed=1,
+    )
+    devin = FakeDevin(
+        latency=(args.devin_latency, args.devin_latency * 2),
+        scope_seconds=(args.scope_seconds / 2, args.scope_seconds * 1.5),
+        implement_seconds=(args.implement_seconds / 2, args.implement_seconds * 1.5),
+        failure_rate=args.devin_failure_rate,
+        rate_limit=args.devin_rate_limit,
+        seed=2,
+    )
+    gh_server, devin_server = TestServer(github.app()), TestServer(devin.app())
+    await gh_server.start_server()
+    await devin_server.start_server()
+
+    import httpx
+    from app import main as app_main
+    from app.github_client import GitHubClient
+    from app.devin_client import DevinClient
+    from app.store import ResultStore
+
+    # wire the app to the fakes explicitly, app.main may already be imported (tests)
+    app_main.SCOPE_CONCURRENCY = app_main.IMPLEMENT_CONCURRENCY = args.sessions
+    app_main._results = ResultStore(":memory:")
+
+    results = []
+    quiet = open(os.devnull, "w") if not args.verbose else sys.stdout
+    try:
+        async with app_main.app.router.lifespan_context(app_main.app):
+            state = app_main.app.state
+            state.github = GitHubClient(state.http, token="bench", owner="bench",
+                                        base_url=str(gh_server.make_url("")))
+            state.scheduler.max_sessions = args.sessions
+            state.devin = DevinClient(state.http, api_key="bench", scheduler=state.scheduler,
+                                      api_base=str(devin_server.make_url("/v1")))
+            state.devin.watcher.min_interval = args.poll_interval
+            state.devin.watcher.max_interval = args.poll_interval * 4
+            for limiter in (state.github.limiter, state.devin.limiter):
+                limiter.base_delay = 0.05
+
+            transport = httpx.ASGITransport(app=app_main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for size in args.sizes:
+                    repo = f"bench-{size}"
+                    github.add_repo(repo, size)
+                    # the app prints poll / access log lines, keep them out of the report
+                    with contextlib.redirect_stdout(quiet):
+                        results.append(await bench_size(client, app_main, devin, repo, size, args.repeat))
+                    print(_line(results[-1]), file=sys.stderr)
+    finally:
+        if quiet is not sys.stdout:
+            quiet.close()
+        await gh_server.close()
+        await devin_server.close()
+    return results
+
+
+def _line(r: Dict[str, Any]) -> str:
+    b = r["batch"]
+    return (
+        f"{r['issues']:>6} issues | list cold {r['list_cold_ms']:>8.1f}ms"
+        f" warm p50 {r['list_warm']['p50_ms']:>6.2f}ms"
+        f" filtered p50 {r['list_filtered']['p50_ms']:>6.2f}ms"
+        f" issue p50 {r['get_issue']['p50_ms']:>6.2f}ms"
+        f" | batch {b['succeeded']}/{b['selected']} in {b['wall_s']:.2f}s"
+        f" ({b['issues_per_s']:.1f}/s, issue p95 {b['issue_latency']['p95_ms']:.0f}ms)"
+    )
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    p.add_argument("--repeat", type=int, default=50, help="requests per endpoint measurement")
+    p.add_argument("--sessions", type=int, default=50, help="DEVIN_MAX_SESSIONS and pool sizes")
+    p.add_argument("--poll-interval", type=float, default=0.05, help="watcher min poll interval (s)")
+    p.add_argument("--github-latency", type=float, default=0.01, help="min GitHub latency (s), max is 2x")
+    p.add_argument("--github-failure-rate", type=float, default=0.0)
+    p.add_argument("--github-rate-limit", type=int, default=0, help="requests per hour, 0 = unlimited")
+    p.add_argument("--devin-latency", type=float, default=0.005)
+    p.add_argument("--devin-failure-rate", type=float, default=0.0)
+    p.add_argument("--devin-rate-limit", type=int, default=0, help="requests per minute, 0 = unlimited")
+    p.add_argument("--scope-seconds", type=float, default=0.1, help="mean scope session duration")
+    p.add_argument("--implement-seconds", type=float, default=0.3, help="mean implement session duration")
+    p.add_argument("--json", action="store_true", help="print results as JSON on stdout")
+    p.add_argument("--verbose", action="store_true", help="keep the app's own log lines")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
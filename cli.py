@@ -1,9 +1,77 @@
 import os, sys, time, textwrap, threading, json, requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode, quote
 from itertools import cycle
 
 BASE_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000").rstrip("/")
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "3"))
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+# (connect, read) seconds for every call to the server
+HTTP_CONNECT_TIMEOUT = float(os.getenv("CLI_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("CLI_READ_TIMEOUT", "30"))
+# the event stream sends a keep-alive comment every few seconds, so this only trips on a dead server
+STREAM_READ_TIMEOUT = float(os.getenv("CLI_STREAM_READ_TIMEOUT", "60"))
+
+# one keep-alive session for the whole REPL, so commands reuse the TCP (and TLS) connection.
+# a couple of connections are enough: the REPL plus the spinner-side polling at most
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# where list / show responses are kept between runs, one small JSON file per repo
+CACHE_DIR = os.path.expanduser(os.getenv("CLI_CACHE_DIR", "~/.cache/devin-issues-cli"))
+CACHE_MAX_ENTRIES = int(os.getenv("CLI_CACHE_MAX_ENTRIES", "200"))  # per repo, oldest go first
+
+
+class DiskCache:
+    """
+    Server responses on disk: repo -> request path -> {etag, data, saved_at}.
+    The etag is the server's version token, sent back as If-None-Match on refresh.
+    Read by the REPL and written by refresh threads, hence the lock.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES):
+        self.root = root
+        self.max_entries = max_entries
+        self._repos = {}
+        self._lock = threading.Lock()
 
-_repo_issues_cache = {}  
+    def _file(self, repo: str) -> str:
+        return os.path.join(self.root, quote(repo, safe="") + ".json")
+
+    def _entries(self, repo: str) -> dict:
+        if repo not in self._repos:
+            try:
+                with open(self._file(repo)) as f:
+                    self._repos[repo] = json.load(f)
+            except (OSError, ValueError):  # not there yet, or half written by an old crash
+                self._repos[repo] = {}
+        return self._repos[repo]
+
+    def has(self, repo: str) -> bool:
+        with self._lock:
+            return bool(self._entries(repo))
+
+    def get(self, repo: str, path: str):
+        with self._lock:
+            return self._entries(repo).get(path)
+
+    def put(self, repo: str, path: str, data, etag=None):
+        with self._lock:
+            entries = self._entries(repo)
+            entries[path] = {"etag": etag, "data": data, "saved_at": time.time()}
+            while len(entries) > self.max_entries:
+                del entries[min(entries, key=lambda p: entries[p]["saved_at"])]
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                tmp = self._file(repo) + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self._file(repo))
+            except OSError:
+                pass  # read-only home etc., the in-memory copy still works for this run
+
+_disk_cache = DiskCache()
 
 _current_repo = None
 
@@ -17,25 +85,58 @@ def _require_repo():
 def _url(path: str) -> str:
     return f"{BASE_URL}/{path.lstrip('/')}"
 
-def _get(path: str):
-    resp = requests.get(_url(path))
+def _timeout(read=None):
+    return (HTTP_CONNECT_TIMEOUT, read or HTTP_READ_TIMEOUT)
+
+def _json(resp):
     if resp.status_code >= 400:
         try:
             detail = resp.json().get("detail", resp.text)
         except Exception:
             detail = resp.text
-        raise RuntimeError(detail) 
+        raise RuntimeError(detail)
     return resp.json()
 
+def _get(path: str):
+    return _json(_session.get(_url(path), timeout=_timeout()))
+
+def _get_versioned(path: str, etag=None):
+    """GET with If-None-Match. Returns (data, etag), data is None if the server says 304."""
+    resp = _session.get(_url(path), headers={"If-None-Match": etag} if etag else None, timeout=_timeout())
+    if resp.status_code == 304:
+        return None, etag
+    return _json(resp), resp.headers.get("ETag")
+
+def _cached_get(repo: str, path: str, on_change=None):
+    """
+    The cached copy of path right away, refreshed from the server in the background
+    (on_change() is called if it changed). Only the first time is a blocking GET.
+    Returns (data, from_cache).
+    """
+    entry = _disk_cache.get(repo, path)
+    if entry is None:
+        data, etag = _get_versioned(path)
+        _disk_cache.put(repo, path, data, etag)
+        return data, False
+    _start_refresh(repo, path, entry, on_change)
+    return entry["data"], True
+
+def _refresh(repo: str, path: str, entry: dict, on_change=None):
+    try:
+        data, etag = _get_versioned(path, entry.get("etag"))
+    except (requests.exceptions.RequestException, RuntimeError, ValueError):
+        return  # slow / unreachable server or gone upstream, keep what we have
+    if data is None:
+        return
+    _disk_cache.put(repo, path, data, etag)
+    if on_change and data != entry["data"]:
+        on_change()
+
+def _start_refresh(repo: str, path: str, entry: dict, on_change=None):
+    threading.Thread(target=_refresh, args=(repo, path, entry, on_change), daemon=True).start()
+
 def _post(path: str, json=None, timeout=None):
-    resp = requests.post(_url(path), json=json, timeout=timeout)
-    if resp.status_code >= 400:
-        try:
-            detail = resp.json().get("detail", resp.text)
-        except Exception:
-            detail = resp.text
-        raise RuntimeError(detail) 
-    return resp.json()
+    return _json(_session.post(_url(path), json=json, timeout=_timeout(timeout)))
 
 # pretty printing helpers
 def _print_rule(char="-", width=80):
@@ -84,6 +185,10 @@ def _print_issue_result(r: dict):
         print(f"  • Confidence: {confidence}")
     if isinstance(aplan, list):
         print(f"  • Plan steps: {len(aplan)}")
+    if r.get("error"):
+        print(f"  • Error: {r['error']}")
+    if r.get("reason"):
+        print(f"  • Skipped: {r['reason']}")
 
     # Implementer output ---
     executed = r.get("executed") or {}
@@ -117,12 +222,19 @@ def _print_issue_result(r: dict):
 
 
 # CLI commands
-def list_issues(repo: str):
+def list_issues(repo: str, page: int = 1, q: str = None):
+    params = {"page": page, "per_page": LIST_PAGE_SIZE}
+    if q:
+        params["q"] = q
+    changed = lambda: print(f"\n (issues of '{repo}' changed on the server, run it again for the new list)")
     try:
-        data = _get(f"{repo}/issues")
+        data, from_cache = _cached_get(repo, f"{repo}/issues?{urlencode(params)}", on_change=changed)
     except RuntimeError as e:
         print(f" Error: {e}")
         return
+    except requests.exceptions.RequestException as e:
+        print(f" Error: cannot reach server and nothing cached ({e}).")
+        return
 
     issues = data.get("issues")
     if not issues:
@@ -130,23 +242,28 @@ def list_issues(repo: str):
         print(msg)
         return
 
-    issues_sorted = sorted(issues, key=lambda x: x["number"])
-    _repo_issues_cache[repo] = {it["number"]: it for it in issues_sorted}
-
-    print(f"\nIssues for repo '{repo}':")
+    # the server already sorts by number
+    print(f"\nIssues for repo '{repo}'" + (f" matching '{q}'" if q else "") + (" (cached)" if from_cache else "") + ":")
     _print_rule()
-    for issue in issues_sorted:
+    for issue in issues:
         print(f"#{issue['number']:<5} [{issue['state']:<6}] {issue['title']}")
         print(f"     URL: {issue['url']}")
     _print_rule()
+    if "pages" in data and data["pages"] > 1:
+        print(f"Page {data['page']}/{data['pages']} ({data['total']} issues)"
+              + (f", `list {data['page'] + 1}` for more" if data.get("has_more") and not q else ""))
 
 
 def show_issue(repo: str, issue_number: int):
+    changed = lambda: print(f"\n (#{issue_number} changed on the server, `show {issue_number}` again to see it)")
     try:
-        issue = _get(f"{repo}/issues/{issue_number}")
+        issue, _ = _cached_get(repo, f"{repo}/issues/{issue_number}", on_change=changed)
     except RuntimeError as e:
         print(f" Error: {e}")
         return
+    except requests.exceptions.RequestException as e:
+        print(f" Error: cannot reach server and nothing cached ({e}).")
+        return
 
     title = issue["title"]
     state = issue["state"]
@@ -172,61 +289,146 @@ def scope_and_execute_batch(repo: str, issue_numbers: list[int] | None, all_flag
     full_url = _url(path)
     print(f"(POST {full_url})")
 
-    stop_event, spin_thread = _start_spinner("Working with Devin (this can take a while)…")
-
     try:
-        resp = requests.post(full_url, json=body, timeout=None)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as e:
-            stop_event.set(); spin_thread.join()
-            try:
-                detail = resp.json().get("detail", resp.text)
-            except Exception:
-                detail = resp.text
-            print(f" Error {resp.status_code}: {detail}")
-            return
-        data = resp.json()
-    except requests.exceptions.ConnectTimeout:
-        stop_event.set(); spin_thread.join()
-        print(" Error: connect timeout")
+        job = _post(path, json=body, timeout=30)
+    except RuntimeError as e:
+        print(f" Error: {e}")
         return
     except requests.exceptions.ConnectionError as e:
-        stop_event.set(); spin_thread.join()
         print(f" Error: cannot reach server ({e}).")
         return
-    except requests.exceptions.ReadTimeout:
-        stop_event.set(); spin_thread.join()
-        print(" Error: batch took too long (read timeout).")
+    except requests.exceptions.Timeout:
+        print(" Error: server did not accept the batch in time.")
         return
+
+    print(f"Started job {job['job_id']} ({job.get('total_selected')} issues)")
+    wait_for_job(job["job_id"])
+
+
+# progress events from the server, the ones that finish an issue carry its result
+_PROGRESS_LABELS = {
+    "scoping_started": "scoping…",
+    "action_plan": "action plan received, waiting for an implementer",
+    "implementing_started": "implementing…",
+}
+
+def _iter_sse(lines):
+    """Parse text/event-stream lines into (event, data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # keep-alive
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].lstrip())
+
+def _stream_job(job_id: str, printed: set):
+    """
+    Follow GET /jobs/{job_id}/events and print each issue as soon as it finishes.
+    Returns the final job summary, or None if the stream ended before the job did.
+    """
+    with _session.get(_url(f"jobs/{job_id}/events"), stream=True, timeout=_timeout(STREAM_READ_TIMEOUT)) as resp:
+        if resp.status_code >= 400:
+            raise RuntimeError(resp.text)
+        for event, data in _iter_sse(resp.iter_lines(decode_unicode=True)):
+            if event == "job_finished":
+                return data.get("job")
+            if "result" in data:
+                if data["issue_number"] not in printed:
+                    printed.add(data["issue_number"])
+                    _print_issue_result(data["result"])
+            elif event in _PROGRESS_LABELS:
+                print(f"  #{data.get('issue_number')} {_PROGRESS_LABELS[event]}")
+    return None
+
+def _poll_job(job_id: str):
+    """Poll a batch job until it's done. Returns the final job, or None if we gave up."""
+    stop_event, spin_thread = _start_spinner("Working with Devin (this can take a while)…")
+
+    try:
+        while True:
+            data = _get(f"jobs/{job_id}")
+            if data.get("status") in {"finished", "failed"}:
+                return data
+            time.sleep(JOB_POLL_SECONDS)
+    except KeyboardInterrupt:
+        stop_event.set(); spin_thread.join()
+        print(f"\n Stopped waiting. The job keeps running, check it later with `job {job_id}`.")
+    except RuntimeError as e:
+        stop_event.set(); spin_thread.join()
+        print(f" Error: {e}")
+    except requests.exceptions.ConnectionError as e:
+        stop_event.set(); spin_thread.join()
+        print(f" Error: lost the server ({e}). Check the job later with `job {job_id}`.")
     except Exception as e:
         stop_event.set(); spin_thread.join()
         print(f" Unexpected error: {e}")
-        return
     finally:
         stop_event.set(); spin_thread.join()
+    return None
+
+def wait_for_job(job_id: str):
+    """
+    Follow a batch job until it's done, printing each issue as it finishes.
+    Falls back to polling if the event stream isn't available. Ctrl-C leaves the job running on the server.
+    """
+    printed = set()
+    try:
+        data = _stream_job(job_id, printed)
+    except KeyboardInterrupt:
+        print(f"\n Stopped waiting. The job keeps running, check it later with `job {job_id}`.")
+        return
+    except (requests.exceptions.RequestException, RuntimeError, ValueError):
+        data = None
+
+    if data is None:
+        data = _poll_job(job_id)
+        if data is None:
+            return
+        for r in data.get("results") or []:
+            if r.get("issue_number") not in printed:
+                _print_issue_result(r)
 
-    print(f"Finished scope & execute batch for repo '{repo}'\n")
-    
-    total_selected = data.get("total_selected")
-    succeeded = data.get("succeeded")
-    failed = data.get("failed")
-    results = data.get("results") or []
+    repo = data.get("repo")
+    if data.get("status") == "failed":
+        print(f" Batch for repo '{repo}' failed: {data.get('error')}")
+    else:
+        print(f"Finished scope & execute batch for repo '{repo}'")
 
-    print(f"Selected issues: {total_selected}   Succeeded: {succeeded}   Failed: {failed}")
+    print(f"Selected issues: {data.get('total_selected')}   Succeeded: {data.get('succeeded')}   Failed: {data.get('failed')}")
     _print_rule()
 
-    for r in results:
-        _print_issue_result(r)
+def list_jobs(repo: str):
+    try:
+        data = _get(f"jobs?repo={repo}")
+    except RuntimeError as e:
+        print(f" Error: {e}")
+        return
+
+    jobs = data.get("jobs") or []
+    if not jobs:
+        print(f"No batch jobs for repo '{repo}'.")
+        return
+    for j in jobs:
+        print(f"{j['job_id']}  [{j['status']:<8}] {j['completed']}/{j['total_selected']} done"
+              f"   Succeeded: {j['succeeded']}   Failed: {j['failed']}")
 
 def repl():
     HELP_TEXT = (
         "Commands:\n"
         "  use <repo>                       - ALWAYS RUN FIRST. You can use 'github-issues' if you've set GITHUB_OWNER ='ntua-el19128' \n"
-        "  list                             - List issues for a repo (GET /{repo}/issues)\n"
+        "  list [page]                      - List issues for a repo, a page at a time (GET /{repo}/issues)\n"
+        "  search <words>                   - List issues whose title / body has all the words (GET /{repo}/issues?q=)\n"
         "  show <issue_number>              - show details for an issue (GET /{repo}/issues/{issue_number})\n"
         "  resolve all                      - scope + execute all issues via Devin (Post /{repo}/issues/{issue_number}/scope-and-execute-batch)\n"
         "  resolve <n1> <n2> ...            - scope + execute #n issues via Devin (Post /{repo}/issues/{issue_number}/scope-and-execute-batch)\n"
+        "  jobs                             - list batch jobs for the repo (GET /jobs?repo={repo})\n"
+        "  job <job_id>                     - wait for a batch job and show its results (GET /jobs/{job_id})\n"
         "  help                             - list of all cli commands\n"
         "  exit                             - exit cli\n"
     )
@@ -258,9 +460,13 @@ def repl():
             continue
 
         try:
-            if cmd == "list" and len(parts) == 1:
+            if cmd == "list" and len(parts) <= 2:
+                repo = _require_repo()
+                if repo: list_issues(repo, page=int(parts[1]) if len(parts) == 2 else 1)
+
+            elif cmd == "search" and len(parts) >= 2:
                 repo = _require_repo()
-                if repo: list_issues(repo)
+                if repo: list_issues(repo, q=" ".join(parts[1:]))
 
             elif cmd == "show" and len(parts) == 2:
                 repo = _require_repo()
@@ -281,14 +487,28 @@ def repl():
                             print(" Issue numbers must be integers, or use 'all'.")
                             continue
                         scope_and_execute_batch(repo, issue_numbers=nums, all_flag=False)
+            elif cmd == "jobs" and len(parts) == 1:
+                repo = _require_repo()
+                if repo: list_jobs(repo)
+
+            elif cmd == "job" and len(parts) == 2:
+                wait_for_job(parts[1])
+
             elif cmd == "use" and len(parts) == 2:
                 global _current_repo
                 candidate = parts[1]
                 try:
-                    
-                    data = _get(f"{candidate}/issues")
+                    # existence check only, doesn't pull the issue list
+                    repo_info = _get(f"{candidate}/exists")
                     _current_repo = candidate
-                    print(f" Current repo set to: {_current_repo}")
+                    count = repo_info.get("open_issues")
+                    print(f" Current repo set to: {_current_repo}" + (f" ({count} open issues)" if count is not None else ""))
+                except requests.exceptions.RequestException as e:
+                    if _disk_cache.has(candidate):
+                        _current_repo = candidate
+                        print(f" Server unreachable, using cached issues of '{candidate}' ({e})")
+                    else:
+                        print(f" Error: repo '{candidate}' not found or inaccessible ({e})")
                 except Exception as e:
                     print(f" Error: repo '{candidate}' not found or inaccessible ({e})")
 
@@ -1,4 +1,7 @@
 const BASE = import.meta.env.VITE_API_BASE || 'http://127.0.0.1:8000'
+const JOB_POLL_MS = 3000
+// server events that finish an issue, they carry its result
+const RESULT_EVENTS = ['pr_opened', 'failed', 'skipped']
 
 async function _req(path, opts = {}) {
   const url = `${BASE}/${path.replace(/^\/+/, '')}`;
@@ -14,14 +17,64 @@ async function _req(path, opts = {}) {
   return data;
 }
 export const api = {
-  issues(repo) { return _req(`${repo}/issues`); },
+  // params: labels, assignee, q, sort, direction, per_page, page, cursor
+  issues(repo, params = {}) {
+    const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v !== undefined && v !== '')).toString();
+    return _req(`${repo}/issues${qs ? `?${qs}` : ''}`);
+  },
   issue(repo, number) { return _req(`${repo}/issues/${number}`); },
+  // many issues with bodies in one call: { issues: [numbers] } or a filter like issues(), plus fields: [...]
+  issueDetails(repo, body) {
+    return _req(`${repo}/issues/details`, { method: 'POST', body: JSON.stringify(body) });
+  },
   scope(repo, number) { return _req(`${repo}/issues/${number}/scope`, { method: 'POST' }); },
   scopeAndExecute(repo, number) { return _req(`${repo}/issues/${number}/scope-and-execute`, { method: 'POST' }); },
-  scopeAndExecuteBatch(repo, { all = false, issues = [], stop_on_error = false } = {}) {
+  startBatch(repo, { all = false, issues = [] } = {}) {
     return _req(`${repo}/issues/scope-and-execute-batch`, {
       method: 'POST',
-      body: JSON.stringify({ all, issues, stop_on_error })
+      body: JSON.stringify({ all, issues })
     });
+  },
+  job(jobId) { return _req(`jobs/${jobId}`); },
+  jobs(repo) { return _req(`jobs?repo=${encodeURIComponent(repo)}`); },
+  // polls a job until it's done, resolves with the final job
+  async pollJob(jobId, { onProgress, intervalMs = JOB_POLL_MS } = {}) {
+    for (;;) {
+      const job = await this.job(jobId);
+      if (onProgress) onProgress(job);
+      if (job.status === 'finished' || job.status === 'failed') return job;
+      await new Promise(r => setTimeout(r, intervalMs));
+    }
+  },
+  // follows a job's event stream, onProgress gets every finished issue as it lands.
+  // resolves with the final job, falls back to polling if the stream breaks
+  followJob(jobId, opts = {}) {
+    if (typeof EventSource === 'undefined') return this.pollJob(jobId, opts);
+    const { onProgress } = opts;
+    return new Promise((resolve, reject) => {
+      const results = [];
+      const es = new EventSource(`${BASE}/jobs/${jobId}/events`);
+      for (const type of RESULT_EVENTS) {
+        es.addEventListener(type, (e) => {
+          results.push(JSON.parse(e.data).result);
+          if (onProgress) onProgress({ job_id: jobId, status: 'running', results: [...results] });
+        });
+      }
+      es.addEventListener('job_finished', () => {
+        es.close();
+        this.job(jobId).then(resolve, reject);
+      });
+      es.onerror = () => {
+        es.close();
+        this.pollJob(jobId, opts).then(resolve, reject);
+      };
+    });
+  },
+  // starts a background batch job and follows it until it's done, resolves with the final job
+  async scopeAndExecuteBatch(repo, opts = {}, follow = {}) {
+    const { job_id } = await this.startBatch(repo, opts);
+    const job = await this.followJob(job_id, follow);
+    if (job.status === 'failed') throw new Error(job.error || 'Batch failed');
+    return job;
   }
 };
\ No newline at end of file
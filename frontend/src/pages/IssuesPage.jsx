@@ -6,11 +6,18 @@ import Button from '../components/Button'
 import EmptyState from '../components/EmptyState'
 import ExecutionResults from '../components/ExecutionResults'
 
+const PAGE_SIZE = 50
+
 export default function IssuesPage() {
   const { repo } = useRepo()
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
   const [issues, setIssues] = useState([])
+  const [page, setPage] = useState(1)
+  const [pages, setPages] = useState(1)
+  const [total, setTotal] = useState(0)
+  const [search, setSearch] = useState('')
+  const [query, setQuery] = useState('')
   const [selected, setSelected] = useState(() => new Set())
   const [runningIds, setRunningIds] = useState(new Set())
   const [batchRunning, setBatchRunning] = useState(false)
@@ -39,20 +46,25 @@ export default function IssuesPage() {
   }, [repo, resultData, resultSummary])
 
 
-  // fetch issues
+  // back to the first page when the repo or the search changes
+  useEffect(() => { setPage(1) }, [repo, query])
+
+  // fetch one page of issues, the server filters and pages
   useEffect(() => {
     let mounted = true
     setLoading(true)
     setError('')
-    api.issues(repo)
+    api.issues(repo, { q: query, page, per_page: PAGE_SIZE })
       .then((data) => {
-        const list = data.issues || []
-        if (mounted) setIssues(list)
+        if (!mounted) return
+        setIssues(data.issues || [])
+        setPages(data.pages || 1)
+        setTotal(data.total || 0)
       })
       .catch((e) => mounted && setError(e.message || 'Failed to load'))
       .finally(() => mounted && setLoading(false))
     return () => { mounted = false }
-  }, [repo])
+  }, [repo, query, page])
 
   const allChecked = useMemo(() => {
     return issues.length > 0 && selected.size === issues.length
@@ -104,7 +116,7 @@ export default function IssuesPage() {
       const res = await api.scopeAndExecuteBatch(repo, {
         all: false,
         issues: Array.from(selected)
-      })
+      }, { onProgress: setResultData })
       setResultSummary(`Batch done: ${res.succeeded} succeeded, ${res.failed} failed.`)
       setResultData(res)
     } catch (e) {
@@ -120,7 +132,7 @@ export default function IssuesPage() {
     setResultSummary('')
     setResultData(null)
     try {
-      const res = await api.scopeAndExecuteBatch(repo, { all: true })
+      const res = await api.scopeAndExecuteBatch(repo, { all: true }, { onProgress: setResultData })
       setResultSummary(`All issues: ${res.succeeded} succeeded, ${res.failed} failed.`)
       setResultData(res)
     } catch (e) {
@@ -137,7 +149,7 @@ export default function IssuesPage() {
   if (error) {
     return <EmptyState title="Couldn’t load issues" description={error} />
   }
-  if (!issues || issues.length === 0) {
+  if ((!issues || issues.length === 0) && !query) {
     return <EmptyState title="No issues found" description="This repository has no issues (or only PRs)." />
   }
 
@@ -163,6 +175,14 @@ export default function IssuesPage() {
           <span className="small">Select all</span>
         </label>
         <div className="space" />
+        <form onSubmit={(e) => { e.preventDefault(); setQuery(search.trim()) }} className="row" style={{ gap: 8 }}>
+          <input
+            className="input"
+            placeholder="Search title / body"
+            value={search}
+            onChange={(e) => setSearch(e.target.value)}
+          />
+        </form>
         <Button onClick={runSelected} disabled={selected.size === 0 || batchRunning}>
           {batchRunning ? 'Running…' : `Scope & Execute Selected (${selected.size})`}
         </Button>
@@ -191,6 +211,14 @@ export default function IssuesPage() {
         </tbody>
       </table>
 
+      <div className="row" style={{ marginTop: 8 }}>
+        <span className="small">{total} issues{query ? ` matching "${query}"` : ''}</span>
+        <div className="space" />
+        <Button onClick={() => setPage(page - 1)} disabled={page <= 1}>Prev</Button>
+        <span className="small">Page {page} / {pages}</span>
+        <Button onClick={() => setPage(page + 1)} disabled={page >= pages}>Next</Button>
+      </div>
+
       {resultSummary && <p className="small" style={{ marginTop: 10 }}>{resultSummary}</p>}
       <ExecutionResults resultData={resultData} />
     </div>
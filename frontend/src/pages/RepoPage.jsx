@@ -20,7 +20,7 @@ export default function RepoPage() {
     setLoading(true)
     try {
       // ensuring repo exists and warming the server cache
-      await api.issues(trimmed)
+      await api.issues(trimmed, { per_page: 1 })
       setRepo(trimmed)
       nav('/issues')
     } catch (err) {
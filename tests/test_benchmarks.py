@@ -0,0 +1,26 @@
+import pytest
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app.main as main
+from benchmarks import run
+
+
+@pytest.mark.asyncio
+async def test_benchmark_harness_smoke(monkeypatch):
+    """
+    1) run the harness on a tiny repo against the local fakes
+    2) every measurement is filled in
+    3) the batch finishes every issue (no network involved)
+    """
+    for name in ("SCOPE_CONCURRENCY", "IMPLEMENT_CONCURRENCY", "_results"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+
+    [result] = await run.main(run.parse_args(["--sizes", "8", "--repeat", "2", "--poll-interval", "0.01"]))
+
+    assert result["issues"] == 8
+    assert result["list_warm"]["n"] == 2
+    batch = result["batch"]
+    assert batch["succeeded"] == batch["selected"] > 0
+    assert batch["issue_latency"]["n"] == batch["selected"]
@@ -5,11 +5,12 @@ import cli
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 @pytest.fixture(autouse=True)
-def clear_cache_and_repo():
-    cli._repo_issues_cache.clear()
+def clear_cache_and_repo(monkeypatch, tmp_path):
+    monkeypatch.setattr(cli, "_disk_cache", cli.DiskCache(str(tmp_path)))
+    # refresh in the foreground so tests see its effect
+    monkeypatch.setattr(cli, "_start_refresh", cli._refresh)
     cli._current_repo = None
     yield
-    cli._repo_issues_cache.clear()
     cli._current_repo = None
 
 
@@ -20,7 +21,7 @@ def test_list_issues(monkeypatch, capsys):
             {"number": 2, "title": "Bug B", "state": "closed", "url": "http://x/2"},
         ]
     }
-    monkeypatch.setattr(cli, "_get", lambda path: fake_issues)
+    monkeypatch.setattr(cli, "_get_versioned", lambda path, etag=None: (fake_issues, 'W/"v1"'))
 
     cli.list_issues("my-repo")
     out = capsys.readouterr().out
@@ -28,7 +29,7 @@ def test_list_issues(monkeypatch, capsys):
     assert "Bug A" in out
     assert "Bug B" in out
     # and that cache was filled
-    assert 1 in cli._repo_issues_cache["my-repo"]
+    assert cli._disk_cache.has("my-repo")
 
 
 def test_show_issue(monkeypatch, capsys):
@@ -39,15 +40,44 @@ def test_show_issue(monkeypatch, capsys):
         "url": "http://x/1",
         "body": "This is a bug"
     }
-    monkeypatch.setattr(cli, "_get", lambda path: fake_issue)
+    monkeypatch.setattr(cli, "_get_versioned", lambda path, etag=None: (fake_issue, None))
 
     cli.show_issue("my-repo", 1)
     out = capsys.readouterr().out
     assert "#1 [open] Bug A" in out
     assert "This is a bug" in out
 
+def test_list_issues_from_disk_cache(monkeypatch, capsys, tmp_path):
+    """
+    1) list once, the response and its version token land on disk
+    2) a new CLI run lists again: rendered from disk, refreshed with If-None-Match (304)
+    3) with the server down it still renders the cached copy
+    """
+    listing = {"issues": [{"number": 1, "title": "Bug A", "state": "open", "url": "http://x/1"}]}
+    sent = []
+    def fake_get_versioned(path, etag=None):
+        sent.append(etag)
+        return (None, etag) if etag else (listing, 'W/"v1"')
+    monkeypatch.setattr(cli, "_get_versioned", fake_get_versioned)
+    cli.list_issues("my-repo")
+
+    monkeypatch.setattr(cli, "_disk_cache", cli.DiskCache(str(tmp_path)))  # fresh process, same dir
+    capsys.readouterr()
+    cli.list_issues("my-repo")
+    assert "(cached)" in capsys.readouterr().out
+    assert sent == [None, 'W/"v1"']
+
+    def down(path, etag=None):
+        raise cli.requests.exceptions.ConnectionError("refused")
+    monkeypatch.setattr(cli, "_get_versioned", down)
+    cli.list_issues("my-repo")
+    assert "Bug A" in capsys.readouterr().out
+
+
 def test_scope_and_execute_batch_all(monkeypatch, capsys):
     fake_resp = {
+        "job_id": "j1",
+        "status": "finished",
         "repo": "my-repo",
         "total_selected": 2,
         "succeeded": 1,
@@ -57,11 +87,14 @@ def test_scope_and_execute_batch_all(monkeypatch, capsys):
             {"issue_number": 2, "status": "failed", "error": "boom"},
         ]
     }
-    monkeypatch.setattr(cli.requests, "post", lambda url, json=None, timeout=None: type("Resp", (), {
-        "status_code": 200,
-        "json": lambda self=fake_resp: fake_resp,
-        "raise_for_status": lambda self=fake_resp: None
+    fake_job = {"job_id": "j1", "status": "queued", "total_selected": fake_resp["total_selected"]}
+    monkeypatch.setattr(cli._session, "post", lambda url, json=None, timeout=None: type("Resp", (), {
+        "status_code": 202,
+        "json": lambda self=fake_job: fake_job,
+        "raise_for_status": lambda self=fake_job: None
     })())
+    monkeypatch.setattr(cli, "_get", lambda path: fake_resp)
+    monkeypatch.setattr(cli, "_stream_job", lambda job_id, printed: None)  # no event stream, poll
 
     cli.scope_and_execute_batch("my-repo", issue_numbers=None, all_flag=True)
     out = capsys.readouterr().out
@@ -75,6 +108,8 @@ def test_scope_and_execute_batch_all(monkeypatch, capsys):
 
 def test_scope_and_execute_batch_selected(monkeypatch, capsys):
     fake_resp = {
+        "job_id": "j1",
+        "status": "finished",
         "repo": "my-repo",
         "total_selected": 1,
         "succeeded": 1,
@@ -83,15 +118,74 @@ def test_scope_and_execute_batch_selected(monkeypatch, capsys):
             {"issue_number": 3, "status": "success", "scoped": {}, "executed": {"branch_name": "fix-c"}},
         ]
     }
-    monkeypatch.setattr(cli.requests, "post", lambda url, json=None, timeout=None: type("Resp", (), {
-        "status_code": 200,
-        "json": lambda self=fake_resp: fake_resp,
-        "raise_for_status": lambda self=fake_resp: None
+    fake_job = {"job_id": "j1", "status": "queued", "total_selected": fake_resp["total_selected"]}
+    monkeypatch.setattr(cli._session, "post", lambda url, json=None, timeout=None: type("Resp", (), {
+        "status_code": 202,
+        "json": lambda self=fake_job: fake_job,
+        "raise_for_status": lambda self=fake_job: None
     })())
+    monkeypatch.setattr(cli, "_get", lambda path: fake_resp)
+    monkeypatch.setattr(cli, "_stream_job", lambda job_id, printed: None)  # no event stream, poll
 
     cli.scope_and_execute_batch("my-repo", issue_numbers=[3], all_flag=False)
     out = capsys.readouterr().out
     assert "Scope & Execute (batch) for my-repo: [3]" in out
     assert "Selected issues: 1   Succeeded: 1   Failed: 0" in out
     assert "Issue #3: success" in out
-    assert "Branch: fix-c" in out
\ No newline at end of file
+    assert "Branch: fix-c" in out
+
+
+def test_wait_for_job_polls_until_done(monkeypatch, capsys):
+    snapshots = iter([
+        {"job_id": "j1", "status": "running", "repo": "my-repo", "results": []},
+        {"job_id": "j1", "status": "finished", "repo": "my-repo", "total_selected": 1,
+         "succeeded": 1, "failed": 0,
+         "results": [{"issue_number": 5, "status": "success", "executed": {"branch_name": "fix-e"}}]},
+    ])
+    paths = []
+
+    def fake_get(path):
+        paths.append(path)
+        return next(snapshots)
+
+    monkeypatch.setattr(cli, "_get", fake_get)
+    monkeypatch.setattr(cli, "_stream_job", lambda job_id, printed: None)
+    monkeypatch.setattr(cli, "JOB_POLL_SECONDS", 0)
+
+    cli.wait_for_job("j1")
+    out = capsys.readouterr().out
+    assert paths == ["jobs/j1", "jobs/j1"]
+    assert "Issue #5: success" in out
+    assert "Branch: fix-e" in out
+
+
+
+def test_wait_for_job_streams_results(monkeypatch, capsys):
+    events = [
+        'event: scoping_started', 'data: {"type": "scoping_started", "issue_number": 7}', '',
+        ': keep-alive', '',
+        'event: pr_opened',
+        'data: {"type": "pr_opened", "issue_number": 7, "result": '
+        '{"issue_number": 7, "status": "success", "executed": {"pull_request_url": "http://x/pr/7"}}}',
+        '',
+        'event: job_finished',
+        'data: {"type": "job_finished", "job": {"repo": "my-repo", "status": "finished", '
+        '"total_selected": 1, "succeeded": 1, "failed": 0}}',
+        '',
+    ]
+
+    class FakeStream:
+        status_code = 200
+        def __enter__(self): return self
+        def __exit__(self, *a): pass
+        def iter_lines(self, decode_unicode=True): return iter(events)
+
+    monkeypatch.setattr(cli._session, "get", lambda url, stream=None, timeout=None: FakeStream())
+    monkeypatch.setattr(cli, "_get", lambda path: pytest.fail("should not poll"))
+
+    cli.wait_for_job("j1")
+    out = capsys.readouterr().out
+    assert "#7 scoping…" in out
+    assert "Issue #7: success" in out
+    assert "Pull Request: http://x/pr/7" in out
+    assert "Selected issues: 1   Succeeded: 1   Failed: 0" in out
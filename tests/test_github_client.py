@@ -0,0 +1,122 @@
+import pytest
+import sys, os
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.github_client import GitHubClient
+
+
+async def _client_for(handler):
+    """Serve handler on a local port and return a GitHubClient pointed at it."""
+    api = web.Application()
+    api.router.add_get("/repos/{owner}/{repo}/issues", handler)
+    server = TestServer(api)
+    await server.start_server()
+    session = aiohttp.ClientSession()
+    return GitHubClient(session, token="t", owner="o", base_url=str(server.make_url(""))), server, session
+
+
+@pytest.mark.asyncio
+async def test_fetch_issues_follows_all_pages():
+    """
+    1) given a repo whose issues span 3 pages
+    2) call fetch_issues
+    3) every page is requested with per_page=100 and results keep page order,
+       and no ETag is kept (page 1's can't vouch for the other pages)
+    """
+    pages = {1: [{"number": 1}, {"number": 2}], 2: [{"number": 3}], 3: [{"number": 4}]}
+    seen = []
+
+    async def handler(request):
+        page = int(request.query["page"])
+        seen.append(request.query)
+        headers = {"ETag": '"v1"'}
+        if page == 1:
+            headers["Link"] = f'<{request.url.with_query(per_page=100, page=3)}>; rel="last"'
+        return web.json_response(pages[page], headers=headers)
+
+    gh, server, session = await _client_for(handler)
+    try:
+        listing = await gh.fetch_issues("r")
+    finally:
+        await session.close()
+        await server.close()
+
+    assert [i["number"] for i in listing.issues] == [1, 2, 3, 4]
+    assert listing.etag is None and listing.last_modified is None
+    assert sorted(int(q["page"]) for q in seen) == [1, 2, 3]
+    assert all(q["per_page"] == "100" for q in seen)
+
+
+@pytest.mark.asyncio
+async def test_single_page_listing_keeps_its_validators():
+    async def handler(request):
+        return web.json_response([{"number": 1}], headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    gh, server, session = await _client_for(handler)
+    try:
+        listing = await gh.fetch_issues("r")
+    finally:
+        await session.close()
+        await server.close()
+
+    assert listing.etag == '"v1"'
+    assert listing.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_fetch_issues_not_modified():
+    """
+    1) given an ETag from a previous listing
+    2) call fetch_issues with it
+    3) If-None-Match is sent and a 304 comes back as None
+    """
+    sent = {}
+
+    async def handler(request):
+        sent.update(request.headers)
+        return web.Response(status=304)
+
+    gh, server, session = await _client_for(handler)
+    try:
+        assert await gh.fetch_issues("r", etag='"v1"') is None
+    finally:
+        await session.close()
+        await server.close()
+    assert sent["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_fetch_issues_since_asks_for_all_states():
+    sent = {}
+
+    async def handler(request):
+        sent.update(request.query)
+        return web.json_response([{"number": 1, "state": "closed"}])
+
+    gh, server, session = await _client_for(handler)
+    try:
+        listing = await gh.fetch_issues("r", since="2024-01-01T00:00:00Z")
+    finally:
+        await session.close()
+        await server.close()
+    assert listing.issues == [{"number": 1, "state": "closed"}]
+    assert sent["since"] == "2024-01-01T00:00:00Z"
+    assert sent["state"] == "all"
+
+
+@pytest.mark.asyncio
+async def test_fetch_issues_repo_not_found():
+    async def handler(request):
+        return web.json_response({"message": "Not Found"}, status=404)
+
+    gh, server, session = await _client_for(handler)
+    try:
+        with pytest.raises(ValueError):
+            await gh.fetch_issues("missing")
+    finally:
+        await session.close()
+        await server.close()
@@ -0,0 +1,67 @@
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.issue_cache import IssueCache
+
+
+def test_lru_eviction_by_repo_count():
+    cache = IssueCache(max_repos=2)
+    cache.put("a", [{"number": 1}])
+    cache.put("b", [{"number": 1}])
+    cache.get("a")  # a is now most recently used
+    cache.put("c", [{"number": 1}])
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_lru_eviction_by_issue_count():
+    cache = IssueCache(max_issues=3)
+    cache.put("a", [{"number": 1}, {"number": 2}])
+    cache.put("b", [{"number": 1}, {"number": 2}])
+
+    assert "a" not in cache
+    assert list(cache["b"]) == [1, 2]
+
+
+def test_ttl_and_touch():
+    cache = IssueCache(ttl_seconds=0)
+    entry = cache.put("a", [{"number": 1}], etag='"x"')
+    assert not cache.is_fresh(entry)
+
+    cache.ttl_seconds = 60
+    assert cache.is_fresh(cache.touch("a"))
+
+
+def test_delta_sync_until_full_sync_is_due():
+    cache = IssueCache(full_sync_seconds=60)
+    entry = cache.put("a", [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}])
+    assert cache.can_delta_sync(entry) and not cache.full_sync_due(entry)
+
+    cache.full_sync_seconds = 0
+    assert cache.full_sync_due(entry) and not cache.can_delta_sync(entry)
+    # a full listing starts the clock again
+    cache.full_sync_seconds = 60
+    assert cache.can_delta_sync(cache.put("a", [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}]))
+
+
+def test_delta_etag_lasts_while_high_water_stays_put():
+    cache = IssueCache()
+    cache.put("a", [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}])
+
+    entry = cache.merge("a", [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}], etag='"d1"')
+    assert entry.delta_etag == '"d1"'
+
+    entry = cache.merge("a", [{"number": 2, "updated_at": "2024-01-02T00:00:00Z"}], etag='"d2"')
+    assert entry.high_water == "2024-01-02T00:00:00Z" and entry.delta_etag is None
+
+
+def test_touch_puts_back_an_entry_evicted_during_revalidation():
+    cache = IssueCache(max_repos=1)
+    entry = cache.put("a", [{"number": 1}], etag='"x"')
+    cache.put("b", [{"number": 1}])  # evicts a while its conditional request is out
+
+    assert cache.touch("a") is None
+    assert cache.touch("a", entry) is entry
+    assert list(cache["a"]) == [1]
@@ -0,0 +1,91 @@
+import pytest
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.issue_query import IssueQuery, query_issues
+from app.issue_index import IssueIndex
+
+ISSUES = [
+    {"number": n, "title": f"Bug {n}", "body": "crash on start" if n % 2 else "typo in docs",
+     "state": "open", "html_url": f"http://x/{n}", "updated_at": f"2024-01-{n:02d}T00:00:00Z",
+     "labels": [{"name": "bug"}] if n % 3 == 0 else [],
+     "assignees": [{"login": "ana"}] if n <= 2 else []}
+    for n in range(1, 11)
+] + [{"number": 11, "title": "A PR", "state": "open", "html_url": "http://x/11", "pull_request": {}}]
+INDEX = IssueIndex(ISSUES)
+
+
+def test_filters():
+    """
+    1) given ten issues and a PR
+    2) filter by label, assignee and text
+    3) only matching issues come back, never the PR
+    """
+    numbers = lambda **kw: [i["number"] for i in query_issues(INDEX, IssueQuery(**kw))["issues"]]
+    assert numbers() == list(range(1, 11))
+    assert numbers(labels=["BUG"]) == [3, 6, 9]
+    assert numbers(assignee="ana") == [1, 2]
+    assert numbers(assignee="none", q="crash") == [3, 5, 7, 9]
+
+
+def test_cursor_pages_cover_everything_once():
+    """
+    1) page through issues sorted by updated desc, 3 at a time, with next_cursor
+    2) collect every page
+    3) each issue shows up exactly once, in order
+    """
+    seen, cursor = [], None
+    while True:
+        page = query_issues(INDEX, IssueQuery(sort="updated", direction="desc", per_page=3, cursor=cursor))
+        seen += [i["number"] for i in page["issues"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == list(range(10, 0, -1))
+
+
+def test_page_numbers_and_bad_params():
+    page = query_issues(INDEX, IssueQuery(per_page=4, page=3))
+    assert [i["number"] for i in page["issues"]] == [9, 10]
+    assert (page["total"], page["pages"], page["has_more"]) == (10, 3, False)
+
+    with pytest.raises(ValueError):
+        IssueQuery(sort="votes")
+    with pytest.raises(ValueError):
+        query_issues(INDEX, IssueQuery(sort="number", cursor=IssueQuery(sort="updated").encode_cursor(("x", 1))))
+    # tampered keys of the wrong shape or type are bad cursors too, not a crash in bisect
+    for sort, key in (("created", (1, 2)), ("number", ("a", 1)), ("number", (1,)), ("comments", (True, 1))):
+        with pytest.raises(ValueError):
+            query_issues(INDEX, IssueQuery(sort=sort, cursor=IssueQuery(sort=sort).encode_cursor(key)))
+
+
+def test_index_follows_updates():
+    """
+    1) given an indexed issue
+    2) it gets relabeled and retitled
+    3) the old label / words stop matching, the new ones match
+    """
+    index = IssueIndex([{"number": 1, "title": "Crash on start", "state": "open", "labels": [{"name": "bug"}]}])
+    index.add({"number": 1, "title": "Slow startup", "state": "open", "labels": [{"name": "perf"}]})
+
+    assert index.with_label("bug") == set() and index.with_label("PERF") == {1}
+    assert index.with_token("crash") == set() and index.with_token("slow") == {1}
+    assert 11 in INDEX.pull_requests and 11 not in INDEX
+
+
+def test_version_only_moves_on_real_changes():
+    """
+    1) given an indexed issue
+    2) the same record comes in again (as an inclusive `since` delta returns it), then an edit
+    3) the version, and so every ETag made of it, only changes for the edit
+    """
+    raw = {"number": 1, "title": "Crash", "state": "open", "updated_at": "2024-01-01T00:00:00Z"}
+    index = IssueIndex([raw])
+    version = index.version
+
+    index.add(dict(raw))
+    assert index.version == version
+
+    index.add(dict(raw, title="Crash on start", updated_at="2024-01-02T00:00:00Z"))
+    assert index.version != version and index.with_token("start") == {1}
@@ -1,19 +1,58 @@
-import pytest
-import sys, os
+import pytest, asyncio
+import sys, os, time, json
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.main import app, _repo_issues_cache
+import app.main as main
+from app.main import app, _repo_issues_cache, _jobs
+from app.store import ResultStore, issue_content_hash
+from app.github_client import IssueListing
 # send requests to the app without running a server
 client = TestClient(app)
 
+class FakeGitHub:
+    """Stands in for app.state.github, returns the given listings in turn."""
+    def __init__(self, *listings):
+        self.listings = list(listings)
+        self.calls = []
+
+    async def fetch_issues(self, repo, etag=None, last_modified=None, since=None):
+        self.calls.append(since or etag)
+        return self.listings[min(len(self.calls), len(self.listings)) - 1]
+
+    async def repo_exists(self, repo):
+        self.calls.append(f"exists:{repo}")
+        return repo != "missing"
+
 @pytest.fixture(autouse=True)
-def clear_cache():
+def clear_cache(monkeypatch):
     _repo_issues_cache.clear()
+    _jobs.clear()
+    monkeypatch.setattr(main, "_results", ResultStore(":memory:"))
     yield
     _repo_issues_cache.clear()
+    _jobs.clear()
+
+def run_batch_job(devin, payload, repo="my-repo"):
+    """
+    Start a batch job and poll GET /jobs/{job_id} until it's done.
+    The client is used as a context manager so its event loop outlives the POST
+    and the background job can run (lifespan runs too, so devin is set after it).
+    """
+    with TestClient(app) as c:
+        app.state.devin = devin
+        response = c.post(f"/{repo}/issues/scope-and-execute-batch", json=payload)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(200):
+            data = c.get(f"/jobs/{job_id}").json()
+            if data["status"] in {"finished", "failed"}:
+                return data
+            time.sleep(0.01)
+    raise AssertionError("batch job did not finish")
 
 def test_get_issues_success(monkeypatch):
     """
@@ -25,8 +64,8 @@ def test_get_issues_success(monkeypatch):
         {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
         {"number": 2, "title": "PR B", "state": "open", "html_url": "http://x/2", "pull_request": {}},
     ]
-    # fetch_issues replaced with a fake one that returns our data
-    monkeypatch.setattr("app.main.fetch_issues", lambda repo: fake_issues)
+    # the github client replaced with a fake one that returns our data
+    app.state.github = FakeGitHub(IssueListing(fake_issues))
 
     response = client.get("/my-repo/issues")
     assert response.status_code == 200
@@ -38,16 +77,261 @@ def test_get_issues_success(monkeypatch):
     assert data["issues"][0]["title"] == "Bug A"
 
 
+def test_get_issues_filters_and_pages():
+    """
+    1) given 5 cached issues, two labeled bug
+    2) ask for bug issues one per page, and pass a bad sort key
+    3) only the requested page comes back with paging info, the bad parameters are a 400
+    """
+    _repo_issues_cache["my-repo"] = {
+        n: {"number": n, "title": f"Bug {n}", "state": "open", "html_url": f"http://x/{n}",
+            "labels": [{"name": "bug"}] if n in (2, 4) else []}
+        for n in range(1, 6)
+    }
+
+    data = client.get("/my-repo/issues", params={"labels": "bug", "per_page": 1}).json()
+    assert [i["number"] for i in data["issues"]] == [2]
+    assert data["total"] == 2 and data["has_more"]
+
+    data = client.get("/my-repo/issues", params={"labels": "bug", "per_page": 1, "cursor": data["next_cursor"]}).json()
+    assert [i["number"] for i in data["issues"]] == [4]
+    assert not data["has_more"]
+
+    assert client.get("/my-repo/issues", params={"sort": "votes"}).status_code == 400
+
+def test_issue_details_in_bulk():
+    """
+    1) given 3 cached issues and a PR
+    2) ask for details of some numbers with a projection, then by label filter
+    3) bodies come back in one response, PR / unknown numbers are listed as missing
+    """
+    _repo_issues_cache["my-repo"] = {
+        n: {"number": n, "title": f"Bug {n}", "body": f"body {n}", "state": "open", "html_url": f"http://x/{n}",
+            "labels": [{"name": "bug"}] if n == 2 else []}
+        for n in range(1, 4)
+    }
+    _repo_issues_cache.upsert_issue("my-repo", {"number": 9, "title": "PR", "pull_request": {}, "state": "open"})
+
+    data = client.post("/my-repo/issues/details", json={"issues": [3, 1, 9, 42], "fields": ["body"]}).json()
+    assert data == {"issues": [{"number": 3, "body": "body 3"}, {"number": 1, "body": "body 1"}], "missing": [9, 42]}
+
+    data = client.post("/my-repo/issues/details", json={"labels": ["bug"]}).json()
+    assert data["total"] == 1
+    assert data["issues"][0]["body"] == "body 2" and data["issues"][0]["labels"] == ["bug"]
+
+    assert client.post("/my-repo/issues/details", json={"issues": [1], "fields": ["votes"]}).status_code == 400
+
+def test_large_listing_is_gzipped_and_streams_as_ndjson():
+    """
+    1) given 300 cached issues
+    2) list them with Accept-Encoding gzip, then as NDJSON
+    3) the page is compressed, the NDJSON has every issue (newest number first) one per line
+    """
+    _repo_issues_cache["my-repo"] = {
+        n: {"number": n, "title": f"Bug {n} " + "x" * 50, "state": "open", "html_url": f"http://x/{n}"}
+        for n in range(1, 301)
+    }
+
+    response = client.get("/my-repo/issues", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["total"] == 300
+
+    response = client.get("/my-repo/issues", params={"direction": "desc"}, headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["x-total-count"] == "300"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["number"] for r in rows] == list(range(300, 0, -1))
+
+def test_metrics_count_cache_hits():
+    """
+    1) given a cached repo
+    2) list its issues twice
+    3) /metrics counts both as cache hits
+    """
+    from app.metrics import ISSUE_CACHE_REQUESTS
+    _repo_issues_cache["my-repo"] = {1: {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"}}
+    before = ISSUE_CACHE_REQUESTS.value(result="hit")
+
+    client.get("/my-repo/issues")
+    client.get("/my-repo/issues")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f'issue_cache_requests_total{{result="hit"}} {int(before) + 2}' in response.text
+    assert "# TYPE devin_session_seconds histogram" in response.text
+
+def test_get_repo_checks_existence_without_listing():
+    """
+    1) given one cached repo and GitHub knowing another
+    2) call GET /{repo}/exists for the cached one, the uncached one and a missing one
+    3) cached answers from the cache, the others ask GitHub once and never list issues
+    """
+    github = FakeGitHub(IssueListing([]))
+    app.state.github = github
+    _repo_issues_cache["my-repo"] = {1: {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"}}
+
+    response = client.get("/my-repo/exists")
+    assert response.json() == {"repo": "my-repo", "exists": True, "cached": True, "open_issues": 1}
+    assert client.get("/other-repo/exists").json()["cached"] is False
+    assert client.get("/missing/exists").status_code == 404
+    assert github.calls == ["exists:other-repo", "exists:missing"]
+    # repos named like fixed routes are checked, not shadowed by them
+    assert client.get("/jobs/exists").json()["repo"] == "jobs"
+    assert client.get("/metrics/exists").json()["repo"] == "metrics"
+    assert client.get("/jobs").json() == {"jobs": []}
+
+def test_issue_responses_carry_version_etag():
+    """
+    1) given a cached repo
+    2) GET its issues, then again with the ETag as If-None-Match
+    3) 304 until an issue changes, then a new ETag
+    """
+    _repo_issues_cache["my-repo"] = {1: {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"}}
+
+    etag = client.get("/my-repo/issues").headers["etag"]
+    assert client.get("/my-repo/issues", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/my-repo/issues/1", headers={"If-None-Match": etag}).status_code == 304
+
+    _repo_issues_cache.upsert_issue("my-repo", {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2"})
+    response = client.get("/my-repo/issues", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
 def test_get_issue_not_found(monkeypatch):
     """
     1) given a repo that exists but has no issues
     2) call GET /{repo}/issues/{issue_number}
     3) we should get a 404 Not Found
     """
-    monkeypatch.setattr("app.main.fetch_issues", lambda repo: [])
+    app.state.github = FakeGitHub(IssueListing([]))
     response = client.get("/my-repo/issues/1")
     assert response.status_code == 404
 
+def test_get_issue_revalidates_with_etag(monkeypatch):
+    """
+    1) given a cached repo listing that has gone stale
+    2) call GET /{repo}/issues/{issue_number}
+    3) the cached ETag is sent and a 304 serves the issue from the cache
+    """
+    github = FakeGitHub(IssueListing(
+        [{"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1", "body": "b"}],
+        etag='"abc"',
+    ), None)
+    app.state.github = github
+    monkeypatch.setattr(_repo_issues_cache, "ttl_seconds", 0)
+
+    assert client.get("/my-repo/issues").status_code == 200
+    response = client.get("/my-repo/issues/1")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Bug A"
+    assert github.calls == [None, '"abc"']
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_fetch():
+    """
+    1) given an uncached repo and a slow GitHub
+    2) 50 requests for its issues come in at once
+    3) GitHub is called once and everyone gets the listing
+    """
+    class SlowGitHub(FakeGitHub):
+        async def fetch_issues(self, repo, **kw):
+            await asyncio.sleep(0.05)
+            return await super().fetch_issues(repo, **kw)
+
+    github = SlowGitHub(IssueListing([{"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"}]))
+    app.state.github = github
+
+    loaded = await asyncio.gather(*(main._load_issues("my-repo") for _ in range(50)))
+
+    assert len(github.calls) == 1
+    assert all(1 in index for index in loaded)
+
+def test_stale_listing_is_caught_up_with_since(monkeypatch):
+    """
+    1) given a cached listing whose newest issue was updated on Jan 2
+    2) it goes stale and GET /{repo}/issues is called again
+    3) only changes since Jan 2 are fetched, merged in, and closed issues drop out
+    """
+    github = FakeGitHub(
+        IssueListing([
+            {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2", "updated_at": "2024-01-02T00:00:00Z"},
+            {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1", "updated_at": "2024-01-01T00:00:00Z"},
+        ]),
+        IssueListing([
+            {"number": 3, "title": "Bug C", "state": "open", "html_url": "http://x/3", "updated_at": "2024-01-05T00:00:00Z"},
+            {"number": 1, "title": "Bug A", "state": "closed", "html_url": "http://x/1", "updated_at": "2024-01-04T00:00:00Z"},
+        ]),
+    )
+    app.state.github = github
+    monkeypatch.setattr(_repo_issues_cache, "ttl_seconds", 0)
+
+    client.get("/my-repo/issues")
+    issues = client.get("/my-repo/issues").json()["issues"]
+
+    assert sorted(i["number"] for i in issues) == [2, 3]
+    assert github.calls == [None, "2024-01-02T00:00:00Z"]
+    assert _repo_issues_cache.get("my-repo").high_water == "2024-01-05T00:00:00Z"
+
+def test_unchanged_repo_revalidates_its_delta_with_etag(monkeypatch):
+    """
+    1) given a cached listing of issues with updated_at
+    2) it goes stale three times without changes, then an issue is edited
+    3) the first delta gets an ETag, the next ones send it and get 304s, the edit comes through as a 200
+    """
+    first = {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1", "updated_at": "2024-01-01T00:00:00Z"}
+    edited = dict(first, title="Bug A, edited", updated_at="2024-01-02T00:00:00Z")
+
+    class GitHub:
+        def __init__(self):
+            self.calls = []
+            self.edited = False
+
+        async def fetch_issues(self, repo, etag=None, last_modified=None, since=None):
+            self.calls.append((since, etag))
+            if since is None:
+                return IssueListing([first])
+            if self.edited:
+                return IssueListing([edited], etag='"d2"')
+            return None if etag == '"d1"' else IssueListing([first], etag='"d1"')
+
+    github = GitHub()
+    app.state.github = github
+    monkeypatch.setattr(_repo_issues_cache, "ttl_seconds", 0)
+
+    for _ in range(4):
+        client.get("/my-repo/issues")
+    github.edited = True
+    issues = client.get("/my-repo/issues").json()["issues"]
+
+    since = "2024-01-01T00:00:00Z"
+    assert github.calls == [(None, None), (since, None), (since, '"d1"'), (since, '"d1"'), (since, '"d1"')]
+    assert issues[0]["title"] == "Bug A, edited"
+    # new high-water mark, new delta URL: the old ETag is dropped
+    assert _repo_issues_cache.get("my-repo").delta_etag is None
+
+def test_full_sync_is_unconditional_and_deltas_resume(monkeypatch):
+    """
+    1) given a cached listing with an ETag whose full sync is due
+    2) it goes stale twice
+    3) the full listing goes out without the ETag (so a 304 can't skip it), then deltas take over again
+    """
+    listing = IssueListing(
+        [{"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1", "updated_at": "2024-01-01T00:00:00Z"}],
+        etag='"abc"',
+    )
+    github = FakeGitHub(listing, listing, IssueListing([]))
+    app.state.github = github
+    monkeypatch.setattr(_repo_issues_cache, "ttl_seconds", 0)
+
+    client.get("/my-repo/issues")
+    monkeypatch.setattr(_repo_issues_cache, "full_sync_seconds", 0)
+    client.get("/my-repo/issues")
+    monkeypatch.setattr(_repo_issues_cache, "full_sync_seconds", 3600)
+    client.get("/my-repo/issues")
+
+    assert github.calls == [None, None, "2024-01-01T00:00:00Z"]
+
 @pytest.mark.asyncio
 async def test_scope_and_execute_batch_all(monkeypatch):
     """
@@ -59,7 +343,7 @@ async def test_scope_and_execute_batch_all(monkeypatch):
         {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
         {"number": 2, "title": "PR B", "state": "open", "html_url": "http://x/2", "pull_request": {}},
     ]
-    monkeypatch.setattr("app.main.fetch_issues", lambda repo: fake_issues)
+    app.state.github = FakeGitHub(IssueListing(fake_issues))
     _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
 
     fake_scope = {"action_plan": ["step 1", "step 2"]}
@@ -67,14 +351,8 @@ async def test_scope_and_execute_batch_all(monkeypatch):
     mock_devin = AsyncMock()
     mock_devin.scope_issue.return_value = fake_scope
     mock_devin.implement_issue.return_value = fake_execute
-    app.state.devin = mock_devin
-
-    response = client.post(
-        "/my-repo/issues/scope-and-execute-batch",
-        json={"all": True}
-    )
-    assert response.status_code == 200
-    data = response.json()
+    data = run_batch_job(mock_devin, {"all": True})
+    assert data["status"] == "finished"
 
     # One succeeded - one skipped (PR)
     assert data["succeeded"] == 1
@@ -95,7 +373,7 @@ async def test_scope_and_execute_batch_selected(monkeypatch):
         {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
         {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2"},
     ]
-    monkeypatch.setattr("app.main.fetch_issues", lambda repo: fake_issues)
+    app.state.github = FakeGitHub(IssueListing(fake_issues))
     _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
 
     fake_scope = {"action_plan": ["do something"]}
@@ -103,17 +381,412 @@ async def test_scope_and_execute_batch_selected(monkeypatch):
     mock_devin = AsyncMock()
     mock_devin.scope_issue.return_value = fake_scope
     mock_devin.implement_issue.return_value = fake_execute
-    app.state.devin = mock_devin
-
-    response = client.post(
-        "/my-repo/issues/scope-and-execute-batch",
-        json={"all": False, "issues": [2]}
-    )
-    assert response.status_code == 200
-    data = response.json()
+    data = run_batch_job(mock_devin, {"all": False, "issues": [2]})
 
     # Only issue 2 was processed
     assert data["succeeded"] == 1
     assert data["failed"] == 0
     assert data["results"][0]["issue_number"] == 2
     assert data["results"][0]["status"] == "success"
+
+
+def test_repeated_issue_runs_once():
+    """
+    1) given a batch that lists issue 5 twice
+    2) run it
+    3) issue 5 gets one scoper and one implementer session, and is counted once
+    """
+    _repo_issues_cache["my-repo"] = {5: {"number": 5, "title": "Bug 5", "state": "open", "html_url": "http://x/5"}}
+    mock_devin = AsyncMock()
+    mock_devin.scope_issue.return_value = {"action_plan": ["step"]}
+    mock_devin.implement_issue.return_value = {"branch_name": "fix-5"}
+
+    data = run_batch_job(mock_devin, {"issues": [5, 5]})
+
+    assert data["total_selected"] == 1 and data["succeeded"] == 1
+    assert mock_devin.scope_issue.call_count == 1
+    assert mock_devin.implement_issue.call_count == 1
+
+
+def test_scope_and_execute_batch_bounded_concurrency(monkeypatch):
+    """
+    1) given a repo with more issues than SCOPE_CONCURRENCY
+    2) call POST /{repo}/issues/scope-and-execute-batch with all=True
+    3) issues are scoped in parallel but never more than the limit, one failure stays isolated
+    """
+    fake_issues = [
+        {"number": n, "title": f"Bug {n}", "state": "open", "html_url": f"http://x/{n}"}
+        for n in range(1, 7)
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+    monkeypatch.setattr("app.main.SCOPE_CONCURRENCY", 2)
+
+    running = peak = 0
+
+    class SlowDevin:
+        async def scope_issue(self, repo, issue_number, issue_title, **kw):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if issue_number == 3:
+                raise RuntimeError("Devin session creation failed")
+            return {"action_plan": ["step"]}
+
+        async def implement_issue(self, repo, issue_number, issue_title, action_plan, **kw):
+            return {"branch_name": f"fix-{issue_number}"}
+
+    data = run_batch_job(SlowDevin(), {"all": True})
+
+    assert peak == 2
+    assert data["succeeded"] == 5
+    assert data["failed"] == 1
+    assert [r["issue_number"] for r in data["results"]] == [1, 2, 3, 4, 5, 6]
+    assert data["results"][2]["status"] == "failed"
+
+
+def test_job_status_reports_partial_results(monkeypatch):
+    """
+    1) given a batch where one issue is still being worked on
+    2) poll GET /jobs/{job_id}
+    3) the job is running and already lists the issue that finished
+    """
+    fake_issues = [
+        {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
+        {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2"},
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+
+    class Devin:
+        release = asyncio.Event()
+
+        async def scope_issue(self, repo, issue_number, issue_title, **kw):
+            if issue_number == 2:
+                await self.release.wait()
+            return {"action_plan": ["step"]}
+
+        async def implement_issue(self, repo, issue_number, issue_title, action_plan, **kw):
+            return {"branch_name": f"fix-{issue_number}"}
+
+    devin = Devin()
+    with TestClient(app) as c:
+        app.state.devin = devin
+        job_id = c.post("/my-repo/issues/scope-and-execute-batch", json={"all": True}).json()["job_id"]
+
+        for _ in range(200):
+            data = c.get(f"/jobs/{job_id}").json()
+            if data["completed"] == 1:
+                break
+            time.sleep(0.01)
+
+        assert data["status"] == "running"
+        assert [r["issue_number"] for r in data["results"]] == [1]
+        assert c.get("/jobs", params={"repo": "my-repo"}).json()["jobs"][0]["job_id"] == job_id
+
+        # let the job finish so nothing is left pending on the loop
+        c.portal.call(devin.release.set)
+        assert c.get("/jobs/nope").status_code == 404
+
+
+def test_job_events_stream(monkeypatch):
+    """
+    1) given a finished batch job with one success and one failure
+    2) read GET /jobs/{job_id}/events
+    3) per-issue progress events arrive in order and the stream ends with job_finished,
+       Last-Event-ID skips what the client already saw
+    """
+    fake_issues = [
+        {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
+        {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2"},
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+    monkeypatch.setattr("app.main.SCOPE_CONCURRENCY", 1)
+    monkeypatch.setattr("app.main.IMPLEMENT_CONCURRENCY", 1)
+
+    mock_devin = AsyncMock()
+    mock_devin.scope_issue.side_effect = [{"action_plan": ["step"]}, {"summary": "no plan"}]
+    mock_devin.implement_issue.return_value = {"pull_request_url": "http://x/pr/1"}
+
+    job = run_batch_job(mock_devin, {"all": True})
+
+    with TestClient(app) as c:
+        response = c.get(f"/jobs/{job['job_id']}/events")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines() if line.startswith("data: ")
+        ]
+        assert [(e["type"], e.get("issue_number")) for e in events] == [
+            ("scoping_started", 1),
+            ("action_plan", 1),
+            ("scoping_started", 2),
+            ("failed", 2),
+            ("implementing_started", 1),
+            ("pr_opened", 1),
+            ("job_finished", None),
+        ]
+        assert events[5]["result"]["executed"]["pull_request_url"] == "http://x/pr/1"
+
+        resumed = c.get(f"/jobs/{job['job_id']}/events", headers={"Last-Event-ID": "5"})
+        assert resumed.text.count("data: ") == 2
+
+        # the same job as NDJSON: summary line, then one line per issue result
+        lines = c.get(f"/jobs/{job['job_id']}", params={"format": "ndjson"}).text.splitlines()
+        assert json.loads(lines[0])["succeeded"] == 1
+        assert [json.loads(l)["issue_number"] for l in lines[1:]] == [1, 2]
+
+
+def test_access_log_line(capsys):
+    """
+    1) call any endpoint
+    2) one JSON access log line is printed with method, path, status and byte count, without the body
+    """
+    app.state.github = FakeGitHub(IssueListing(
+        [{"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"}]
+    ))
+    response = client.get("/my-repo/issues")
+
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l.startswith("{")]
+    record = lines[-1]
+    assert record["method"] == "GET"
+    assert record["path"] == "/my-repo/issues"
+    assert record["status"] == 200
+    assert record["bytes"] == len(response.content)
+    assert "body" not in record
+
+
+
+def test_batch_resumes_from_result_store():
+    """
+    1) given a stored PR for issue 1, a cached action plan for issue 2 and an
+       implementer session for issue 3 that was in flight when the server stopped
+    2) run a batch on all three
+    3) issue 1 starts no session, issue 2 skips the scoper, issue 3 reattaches to its session
+    """
+    fake_issues = [
+        {"number": n, "title": f"Bug {n}", "state": "open", "html_url": f"http://x/{n}"}
+        for n in (1, 2, 3)
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+    main._results.save_scope("my-repo", 1, {"action_plan": ["a"]})
+    main._results.save_execution("my-repo", 1, {"pull_request_url": "http://x/pr/1"})
+    main._results.save_scope("my-repo", 2, {"action_plan": ["b"]}, issue_content_hash(fake_issues[1]))
+    main._results.save_scope("my-repo", 3, {"action_plan": ["c"]}, issue_content_hash(fake_issues[2]))
+    main._results.session_started("my-repo", 3, "implement", "devin-3")
+
+    mock_devin = AsyncMock()
+    mock_devin.implement_issue.return_value = {"pull_request_url": "http://x/pr/new"}
+
+    data = run_batch_job(mock_devin, {"all": True})
+
+    assert data["succeeded"] == 3
+    assert data["results"][0]["resumed"] is True
+    mock_devin.scope_issue.assert_not_called()
+    resumed_sessions = {
+        call.kwargs["issue_number"]: call.kwargs["session_id"]
+        for call in mock_devin.implement_issue.call_args_list
+    }
+    assert resumed_sessions == {2: None, 3: "devin-3"}
+    assert main._results.get("my-repo", 2).has_pr
+
+    stored = client.get("/my-repo/results").json()["results"]
+    assert [r["status"] for r in stored] == ["success", "success", "success"]
+
+
+
+def test_scope_cache_follows_issue_content():
+    """
+    1) given cached action plans for two issues, one of which was edited since
+    2) run a batch on both
+    3) only the edited issue goes back to the scoper
+    """
+    fake_issues = [
+        {"number": 1, "title": "Bug A", "body": "same", "updated_at": "2024-01-01T00:00:00Z",
+         "state": "open", "html_url": "http://x/1"},
+        {"number": 2, "title": "Bug B", "body": "edited", "updated_at": "2024-02-01T00:00:00Z",
+         "state": "open", "html_url": "http://x/2"},
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+    main._results.save_scope("my-repo", 1, {"action_plan": ["a"]}, issue_content_hash(fake_issues[0]))
+    before_edit = dict(fake_issues[1], body="original", updated_at="2024-01-01T00:00:00Z")
+    main._results.save_scope("my-repo", 2, {"action_plan": ["b"]}, issue_content_hash(before_edit))
+
+    mock_devin = AsyncMock()
+    mock_devin.scope_issue.return_value = {"action_plan": ["b2"]}
+    mock_devin.implement_issue.return_value = {"branch_name": "fix"}
+
+    data = run_batch_job(mock_devin, {"all": True})
+
+    assert data["succeeded"] == 2
+    assert [c.kwargs["issue_number"] for c in mock_devin.scope_issue.call_args_list] == [2]
+    plans = {c.kwargs["issue_number"]: c.kwargs["action_plan"] for c in mock_devin.implement_issue.call_args_list}
+    assert plans == {1: ["a"], 2: ["b2"]}
+
+
+
+def test_scoping_is_not_held_up_by_implementers(monkeypatch):
+    """
+    1) given one implementer slot and an implementation that blocks
+    2) run a batch of three issues
+    3) all three get scoped while the first implementation is still running
+    """
+    fake_issues = [
+        {"number": n, "title": f"Bug {n}", "state": "open", "html_url": f"http://x/{n}"}
+        for n in (1, 2, 3)
+    ]
+    _repo_issues_cache["my-repo"] = {i["number"]: i for i in fake_issues}
+    monkeypatch.setattr("app.main.SCOPE_CONCURRENCY", 1)
+    monkeypatch.setattr("app.main.IMPLEMENT_CONCURRENCY", 1)
+
+    class Devin:
+        release = asyncio.Event()
+        scoped = []
+
+        async def scope_issue(self, repo, issue_number, issue_title, **kw):
+            self.scoped.append(issue_number)
+            return {"action_plan": ["step"]}
+
+        async def implement_issue(self, repo, issue_number, issue_title, action_plan, **kw):
+            await self.release.wait()
+            return {"branch_name": f"fix-{issue_number}"}
+
+    devin = Devin()
+    with TestClient(app) as c:
+        app.state.devin = devin
+        job_id = c.post("/my-repo/issues/scope-and-execute-batch", json={"all": True}).json()["job_id"]
+        for _ in range(200):
+            if len(devin.scoped) == 3:
+                break
+            time.sleep(0.01)
+
+        assert devin.scoped == [1, 2, 3]
+        assert c.get(f"/jobs/{job_id}").json()["completed"] == 0
+
+        c.portal.call(devin.release.set)
+        for _ in range(200):
+            data = c.get(f"/jobs/{job_id}").json()
+            if data["status"] == "finished":
+                break
+            time.sleep(0.01)
+        assert data["succeeded"] == 3
+
+
+def test_issue_in_a_running_job_is_left_to_it():
+    """
+    1) given a job that is implementing issue 5
+    2) start a second batch on issue 5
+    3) the second job skips it instead of reattaching to the first job's session, and only one PR is opened
+    """
+    _repo_issues_cache["my-repo"] = {5: {"number": 5, "title": "Bug 5", "state": "open", "html_url": "http://x/5"}}
+
+    class Devin:
+        release = asyncio.Event()
+        implemented = []
+
+        async def scope_issue(self, repo, issue_number, issue_title, **kw):
+            return {"action_plan": ["step"]}
+
+        async def implement_issue(self, repo, issue_number, issue_title, action_plan, **kw):
+            self.implemented.append(issue_number)
+            await self.release.wait()
+            return {"branch_name": f"fix-{issue_number}"}
+
+    devin = Devin()
+    with TestClient(app) as c:
+        app.state.devin = devin
+        first = c.post("/my-repo/issues/scope-and-execute-batch", json={"issues": [5]}).json()["job_id"]
+        for _ in range(200):
+            if devin.implemented:
+                break
+            time.sleep(0.01)
+
+        second = c.post("/my-repo/issues/scope-and-execute-batch", json={"issues": [5]}).json()["job_id"]
+        for _ in range(200):
+            data = c.get(f"/jobs/{second}").json()
+            if data["status"] == "finished":
+                break
+            time.sleep(0.01)
+        assert data["results"][0]["status"] == "skipped"
+        assert data["results"][0]["reason"] == f"in progress in job {first}"
+
+        c.portal.call(devin.release.set)
+        for _ in range(200):
+            data = c.get(f"/jobs/{first}").json()
+            if data["status"] == "finished":
+                break
+            time.sleep(0.01)
+        assert data["succeeded"] == 1
+        assert devin.implemented == [5]
+
+
+def _signed_webhook(c, payload, secret="s3cret", event="issues"):
+    import hmac, hashlib
+    raw = json.dumps(payload).encode()
+    sig = "sha256=" + hmac.new(secret.encode(), raw, hashlib.sha256).hexdigest()
+    return c.post("/webhooks/github", content=raw, headers={
+        "X-GitHub-Event": event, "X-Hub-Signature-256": sig, "Content-Type": "application/json",
+    })
+
+
+def test_webhook_updates_cached_issues(monkeypatch):
+    """
+    1) given a cached repo and a configured webhook secret
+    2) GitHub pushes an edit, a new issue and a close
+    3) reads reflect them without going back to GitHub, and bad signatures are refused
+    """
+    monkeypatch.setattr("app.webhooks.GITHUB_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr("app.main.OWNER", "me")
+    github = FakeGitHub(IssueListing([
+        {"number": 1, "title": "Bug A", "state": "open", "html_url": "http://x/1"},
+        {"number": 2, "title": "Bug B", "state": "open", "html_url": "http://x/2"},
+    ]))
+    app.state.github = github
+    assert len(client.get("/my-repo/issues").json()["issues"]) == 2
+
+    repo = {"name": "my-repo", "owner": {"login": "me"}}
+    events = [
+        ("edited", {"number": 1, "title": "Bug A (edited)", "state": "open", "html_url": "http://x/1"}),
+        ("opened", {"number": 3, "title": "Bug C", "state": "open", "html_url": "http://x/3"}),
+        ("closed", {"number": 2, "title": "Bug B", "state": "closed", "html_url": "http://x/2"}),
+    ]
+    for action, issue in events:
+        response = _signed_webhook(client, {"action": action, "issue": issue, "repository": repo})
+        assert response.json()["status"] == "applied"
+
+    _repo_issues_cache.get("my-repo").fetched_at -= 3600  # past the ttl, the push keeps it fresh
+    issues = client.get("/my-repo/issues").json()["issues"]
+    assert [(i["number"], i["title"]) for i in issues] == [(1, "Bug A (edited)"), (3, "Bug C")]
+    assert len(github.calls) == 1
+
+    bad = _signed_webhook(client, {"action": "opened", "issue": events[1][1], "repository": repo}, secret="nope")
+    assert bad.status_code == 401
+    assert _signed_webhook(client, {"zen": "hi"}, event="ping").json() == {"status": "pong"}
+
+
+def test_webhook_auto_scopes_new_issues(monkeypatch):
+    """
+    1) given auto-scope is on
+    2) an issue is opened
+    3) a scope-only job runs and its plan is cached for a later batch
+    """
+    monkeypatch.setattr("app.webhooks.GITHUB_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr("app.webhooks.WEBHOOK_AUTO_SCOPE", True)
+    monkeypatch.setattr("app.main.OWNER", None)
+    issue = {"number": 7, "title": "New bug", "body": "x", "state": "open", "html_url": "http://x/7"}
+
+    mock_devin = AsyncMock()
+    mock_devin.scope_issue.return_value = {"action_plan": ["fix it"]}
+    with TestClient(app) as c:
+        app.state.devin = mock_devin
+        payload = {"action": "opened", "issue": issue, "repository": {"name": "my-repo", "owner": {"login": "me"}}}
+        job_id = _signed_webhook(c, payload).json()["job_id"]
+        for _ in range(200):
+            data = c.get(f"/jobs/{job_id}").json()
+            if data["status"] == "finished":
+                break
+            time.sleep(0.01)
+
+    assert data["results"][0]["status"] == "scoped"
+    mock_devin.implement_issue.assert_not_called()
+    assert main._results.cached_scope("my-repo", 7, issue_content_hash(issue)) == {"action_plan": ["fix it"]}
@@ -0,0 +1,31 @@
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import metrics
+
+
+def test_histogram_and_counter_render():
+    """
+    1) observe a few values into a labeled histogram and bump a counter
+    2) render the registry
+    3) buckets are cumulative and the text is in Prometheus format
+    """
+    h = metrics.Histogram("test_latency_seconds", "test", ["api"], buckets=(0.1, 1))
+    c = metrics.Counter("test_requests_total", "test", ["result"])
+    try:
+        for v in (0.05, 0.5, 5):
+            h.observe(v, api="github")
+        c.inc(result="hit")
+        c.inc(2, result="hit")
+
+        text = metrics.render()
+        assert "# TYPE test_latency_seconds histogram" in text
+        assert 'test_latency_seconds_bucket{api="github",le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{api="github",le="1"} 2' in text
+        assert 'test_latency_seconds_bucket{api="github",le="+Inf"} 3' in text
+        assert 'test_latency_seconds_count{api="github"} 3' in text
+        assert 'test_requests_total{result="hit"} 3' in text
+    finally:
+        metrics.REGISTRY.remove(h)
+        metrics.REGISTRY.remove(c)
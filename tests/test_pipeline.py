@@ -0,0 +1,37 @@
+import pytest, asyncio
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.pipeline import run_two_stage
+
+
+def test_a_raising_stage_leaves_nothing_running():
+    """
+    1) given two scopers, one of which blows up while the other is mid-scope
+    2) run the pipeline
+    3) the error comes out and the other scoper is cancelled, not left running
+    """
+    async def run():
+        cancelled = []
+
+        async def scope(n):
+            if n == 1:
+                raise RuntimeError("store is gone")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(n)
+                raise
+            return None, n
+
+        async def implement(n):
+            return n
+
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(
+                run_two_stage([2, 1], scope, implement, lambda r: None, scope_workers=2, implement_workers=1), 1)
+        await asyncio.sleep(0)
+        return list(cancelled)  # before asyncio.run cancels leftovers itself
+
+    assert asyncio.run(run()) == [2]
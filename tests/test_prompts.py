@@ -0,0 +1,60 @@
+import pytest
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import prompts
+from app.issue_index import Issue
+from app.prompts import PromptTemplate, issue_context, scope_prompt, implement_prompt
+
+
+def comment(login, body, type="User"):
+    return {"user": {"login": login, "type": type}, "body": body}
+
+
+def test_scope_prompt_has_issue_context():
+    """
+    1) given an issue with labels, a templated body and comments (one from a bot)
+    2) build the scoper prompt
+    3) it has the number, labels, body and comments newest first, not the template boilerplate or the bot
+    """
+    issue = Issue(7, "Login fails", body="<!-- describe the bug -->\nLogin returns 500.", labels=("bug", "p1"))
+    comments = [comment("alice", "Started after 2.3"), comment("ci-bot", "coverage 90%", "Bot"), comment("bob", "Same here")]
+
+    prompt = scope_prompt("https://github.com/o/r", 7, issue.title, issue, comments)
+
+    assert prompt.startswith('Hey devin. Your task is to scope the GitHub issue #7 titled "Login fails"')
+    assert "Labels: bug, p1" in prompt
+    assert "Login returns 500." in prompt and "describe the bug" not in prompt
+    assert prompt.index("@bob: Same here") < prompt.index("@alice: Started after 2.3")
+    assert "coverage" not in prompt
+    assert '"action_plan": [' in prompt
+
+
+def test_issue_context_stays_in_budget():
+    """
+    1) given a huge body and many long comments
+    2) build the context with a small budget
+    3) it fits, the body is clipped, and some comments still made it in
+    """
+    issue = Issue(1, "Big", body="word " * 5000)
+    comments = [comment(f"u{i}", "text " * 400) for i in range(20)]
+
+    context = issue_context(issue, comments, budget=2000)
+
+    assert len(context) <= 2000
+    assert prompts._TRUNCATED in context
+    assert "Recent comments:" in context
+
+
+def test_implement_prompt_and_template_checks():
+    """
+    1) render the implementer prompt, then a template with a value missing
+    2) the plan and issue body are in the prompt, the bad render is a ValueError
+    """
+    prompt = implement_prompt("https://github.com/o/r", 3, "Typo", ["fix it", "add test"], Issue(3, "Typo", body="teh"))
+    assert "Issue #3" in prompt and "Action plan:\n- fix it\n- add test" in prompt
+    assert "Description:\nteh" in prompt
+
+    with pytest.raises(ValueError):
+        PromptTemplate("t", "issue $issue_number in $repo_url").render(issue_number=1)
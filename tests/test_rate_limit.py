@@ -0,0 +1,98 @@
+import pytest
+import sys, os, time
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.rate_limit import RateLimiter
+
+
+async def _serve(handler, method="GET"):
+    api = web.Application()
+    api.router.add_route(method, "/x", handler)
+    server = TestServer(api)
+    await server.start_server()
+    return server, aiohttp.ClientSession()
+
+
+@pytest.mark.asyncio
+async def test_retries_throttled_and_failing_gets():
+    """
+    1) a GET answers 429 (Retry-After: 0), then 503, then 200
+    2) request it through the limiter
+    3) we end up with the 200 after two retries
+    """
+    answers = [
+        web.json_response({}, status=429, headers={"Retry-After": "0"}),
+        web.json_response({}, status=503),
+        web.json_response({"ok": True}),
+    ]
+
+    async def handler(request):
+        return answers.pop(0)
+
+    server, session = await _serve(handler)
+    limiter = RateLimiter("test", base_delay=0.01)
+    try:
+        async with limiter.request(session, "GET", str(server.make_url("/x"))) as resp:
+            assert resp.status == 200
+            assert await resp.json() == {"ok": True}
+    finally:
+        await session.close()
+        await server.close()
+    assert limiter.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_post_not_retried_on_server_error():
+    """
+    1) a POST answers 500
+    2) request it through the limiter
+    3) it's returned as is (creating twice could start two Devin sessions)
+    """
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return web.json_response({}, status=500)
+
+    server, session = await _serve(handler, "POST")
+    limiter = RateLimiter("test", base_delay=0.01)
+    try:
+        async with limiter.request(session, "POST", str(server.make_url("/x"))) as resp:
+            assert resp.status == 500
+    finally:
+        await session.close()
+        await server.close()
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_paces_when_budget_runs_low():
+    """
+    1) a response says 2 of 100 requests are left, resetting in 10s
+    2) the limiter has observed it
+    3) requests get spaced out over the window instead of going straight through
+    """
+    async def handler(request):
+        reset = str(int(time.time()) + 10)
+        return web.json_response({}, headers={
+            "X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "2", "X-RateLimit-Reset": reset,
+        })
+
+    server, session = await _serve(handler)
+    limiter = RateLimiter("test")
+    try:
+        async with limiter.request(session, "GET", str(server.make_url("/x"))):
+            pass
+    finally:
+        await session.close()
+        await server.close()
+    assert limiter.remaining == 2
+    assert 3 < limiter._pace_interval() <= 5.5
+
+    # a healthy budget isn't paced at all
+    limiter.remaining = 80
+    assert limiter._pace_interval() == 0.0
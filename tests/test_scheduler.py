@@ -0,0 +1,97 @@
+import pytest, asyncio
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.scheduler import SessionScheduler, label_priority
+
+
+async def _run(scheduler, order, name, repo, caller="me", priority=0, hold=None):
+    async with scheduler.slot(repo, caller, priority):
+        order.append(name)
+        if hold is not None:
+            await hold.wait()
+
+
+@pytest.mark.asyncio
+async def test_priority_then_fair_share():
+    """
+    1) given one slot taken and waiters from a big batch on repo A, one on repo B and one high priority
+    2) free the slot one release at a time
+    3) high priority goes first, then B gets its turn before A's backlog
+    """
+    scheduler = SessionScheduler(max_sessions=1)
+    order = []
+    hold = asyncio.Event()
+    first = asyncio.create_task(_run(scheduler, order, "a0", "A", hold=hold))
+    await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(_run(scheduler, order, f"a{i}", "A")) for i in (1, 2)]
+    tasks.append(asyncio.create_task(_run(scheduler, order, "b1", "B")))
+    tasks.append(asyncio.create_task(_run(scheduler, order, "urgent", "C", priority=5)))
+    await asyncio.sleep(0)
+
+    stats = scheduler.stats()
+    assert stats["active"] == 1
+    assert stats["queued"] == 4
+    assert stats["queued_by_repo"] == {"A": 2, "B": 1, "C": 1}
+
+    hold.set()
+    await asyncio.gather(first, *tasks)
+    assert order == ["a0", "urgent", "b1", "a1", "a2"]
+    assert scheduler.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fair_share_between_running_tenants():
+    """
+    With two slots and A already running one session, a waiting B is served before more A.
+    """
+    scheduler = SessionScheduler(max_sessions=2)
+    order = []
+    hold_a, hold_x = asyncio.Event(), asyncio.Event()
+    running_a = asyncio.create_task(_run(scheduler, order, "a0", "A", hold=hold_a))
+    running_x = asyncio.create_task(_run(scheduler, order, "x0", "X", hold=hold_x))
+    await asyncio.sleep(0)
+
+    more_a = asyncio.create_task(_run(scheduler, order, "a1", "A", hold=asyncio.Event()))
+    b = asyncio.create_task(_run(scheduler, order, "b1", "B"))
+    await asyncio.sleep(0)
+
+    hold_x.set()  # X finishes, A still holds one slot
+    await b
+    await asyncio.sleep(0)
+    assert order == ["a0", "x0", "b1", "a1"]
+
+    hold_a.set()
+    await running_a
+    more_a.cancel()
+    await asyncio.gather(running_x, more_a, return_exceptions=True)
+    assert scheduler.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = SessionScheduler(max_sessions=1)
+    order = []
+    hold = asyncio.Event()
+    first = asyncio.create_task(_run(scheduler, order, "first", "A", hold=hold))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_run(scheduler, order, "gone", "A"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    hold.set()
+    await first
+
+    assert scheduler.stats()["active"] == 0
+    assert scheduler.stats()["queued"] == 0
+    await _run(scheduler, order, "next", "A")
+    assert order == ["first", "next"]
+
+
+def test_label_priority():
+    assert label_priority([{"name": "Bug"}, {"name": "critical"}]) == 3
+    assert label_priority(["docs"]) == 0
+    assert label_priority(None) == 0
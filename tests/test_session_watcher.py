@@ -0,0 +1,125 @@
+import pytest, asyncio
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.session_watcher import SessionWatcher
+
+
+def _done(body):
+    return body.get("status") == "finished"
+
+
+@pytest.mark.asyncio
+async def test_watcher_resolves_each_session_when_done():
+    """
+    1) given three sessions that finish after 1, 2 and 4 checks
+    2) wait on all of them through one watcher
+    3) each waiter wakes with its own body, and a session is never checked after it's done
+    """
+    finish_after = {"a": 1, "b": 2, "c": 4}
+    checks = {sid: 0 for sid in finish_after}
+
+    async def fetch(sid):
+        checks[sid] += 1
+        status = "finished" if checks[sid] >= finish_after[sid] else "running"
+        return {"session_id": sid, "status": status}
+
+    watcher = SessionWatcher(fetch, min_interval=0.001, max_interval=0.005)
+    bodies = await asyncio.gather(*(watcher.wait(sid, _done, 5) for sid in finish_after))
+
+    assert [b["session_id"] for b in bodies] == ["a", "b", "c"]
+    assert checks == finish_after
+    assert watcher.active == 0
+
+
+@pytest.mark.asyncio
+async def test_watcher_timeout_and_errors_stay_per_session():
+    async def fetch(sid):
+        if sid == "broken":
+            raise RuntimeError("Devin poll failed")
+        return {"status": "running" if sid == "slow" else "finished"}
+
+    watcher = SessionWatcher(fetch, min_interval=0.001, max_interval=0.005)
+    slow, broken, ok = await asyncio.gather(
+        watcher.wait("slow", _done, 0.02),
+        watcher.wait("broken", _done, 5),
+        watcher.wait("ok", _done, 5),
+        return_exceptions=True,
+    )
+
+    assert isinstance(slow, TimeoutError)
+    assert isinstance(broken, RuntimeError)
+    assert ok == {"status": "finished"}
+
+
+def test_backoff_while_status_is_unchanged():
+    async def run():
+        statuses = iter(["running", "running", "running", "blocked_on_user", "finished"])
+
+        async def fetch(sid):
+            return {"status": next(statuses)}
+
+        watcher = SessionWatcher(fetch, min_interval=0.001, max_interval=1, backoff=2)
+        intervals = []
+        original = watcher._check
+
+        async def check(w):
+            await original(w)
+            intervals.append(w.interval)
+
+        watcher._check = check
+        await watcher.wait("s", _done, 5)
+        return intervals
+
+    intervals = asyncio.run(run())
+    # new status -> min interval, same status -> doubled, changed again -> back to min
+    assert intervals[:4] == [0.001, 0.002, 0.004, 0.001]
+
+
+@pytest.mark.asyncio
+async def test_waiters_on_the_same_session_share_polls_and_keep_their_deadlines():
+    checks = []
+
+    async def fetch(sid):
+        checks.append(sid)
+        return {"status": "finished" if len(checks) >= 4 else "running"}
+
+    watcher = SessionWatcher(fetch, min_interval=0.001, max_interval=0.005)
+    impatient, first, second = await asyncio.gather(
+        watcher.wait("s1", _done, 0.0),
+        watcher.wait("s1", _done, 5),
+        watcher.wait("s1", _done, 5),
+        return_exceptions=True,
+    )
+
+    assert isinstance(impatient, TimeoutError)
+    assert first == second == {"status": "finished"}
+    assert len(checks) == 4  # one poll per tick, not one per waiter
+    assert watcher.active == 0
+
+
+@pytest.mark.asyncio
+async def test_a_hanging_or_broken_check_only_holds_up_its_own_session():
+    """
+    1) given one session whose poll hangs and one whose body makes is_done blow up
+    2) wait on those and on a healthy session
+    3) the healthy one finishes, the hanging one times out on schedule, the broken one gets the error
+    """
+    async def fetch(sid):
+        if sid == "hangs":
+            await asyncio.sleep(60)
+        return {"status": "finished"} if sid == "ok" else None
+
+    watcher = SessionWatcher(fetch, min_interval=0.001, max_interval=0.005)
+    hangs, broken, ok = await asyncio.wait_for(asyncio.gather(
+        watcher.wait("hangs", _done, 0.05),
+        watcher.wait("broken", _done, 5),
+        watcher.wait("ok", _done, 5),
+        return_exceptions=True,
+    ), 1)
+
+    assert isinstance(hangs, TimeoutError)
+    assert isinstance(broken, AttributeError)
+    assert ok == {"status": "finished"}
+    assert watcher.active == 0
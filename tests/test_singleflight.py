@@ -0,0 +1,49 @@
+import pytest, asyncio
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    """
+    1) 20 callers ask for the same key while the first call is still running
+    2) let it finish
+    3) fn ran once and everyone got its result, the next call runs again
+    """
+    flight, calls, release = SingleFlight(), [], asyncio.Event()
+
+    async def fetch():
+        calls.append(1)
+        await release.wait()
+        return "issues"
+
+    waiters = [asyncio.create_task(flight.do("repo", fetch)) for _ in range(20)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["issues"] * 20
+    assert len(calls) == 1 and not flight.in_flight("repo")
+    await flight.do("repo", fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_cancelling_one_caller_keeps_the_call():
+    flight, release = SingleFlight(), asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        raise RuntimeError("GitHub API error 502")
+
+    first = asyncio.create_task(flight.do("repo", fetch))
+    second = asyncio.create_task(flight.do("repo", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    with pytest.raises(RuntimeError):
+        await second
+    assert first.cancelled()
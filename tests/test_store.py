@@ -0,0 +1,34 @@
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.store import ResultStore
+
+
+def test_stages_are_recorded(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    store = ResultStore(path)
+    store.session_started("r", 1, "scope", "s-1")
+    store.save_scope("r", 1, {"action_plan": ["x"]})
+    store.session_started("r", 1, "implement", "s-2")
+    store.save_execution("r", 1, {"branch_name": "fix"})
+
+    # a fresh store on the same file sees everything (i.e. after a restart)
+    record = ResultStore(path).get("r", 1)
+    assert record.has_pr
+    assert record.scoped == {"action_plan": ["x"]}
+    assert (record.scope_session_id, record.implement_session_id) == ("s-1", "s-2")
+
+
+def test_failure_forgets_in_flight_session():
+    store = ResultStore(":memory:")
+    store.save_scope("r", 1, {"action_plan": ["x"]})
+    store.session_started("r", 1, "implement", "s-2")
+    store.save_failure("r", 1, "Timeout")
+    store.save_failure("r", 2, "Scoper did not return a valid action_plan")
+
+    record = store.get("r", 1)
+    assert record.status == "failed"
+    assert record.implement_session_id is None
+    assert record.scoped == {"action_plan": ["x"]}  # the plan is kept
+    assert store.get("r", 2).error.startswith("Scoper")